@@ -1,3 +1,3 @@
-"""
-Backend package initialization.
+"""
+Backend package initialization.
 """
\ No newline at end of file
@@ -1,3 +1,3 @@
-"""
-Authentication package initialization.
+"""
+Authentication package initialization.
 """
\ No newline at end of file
@@ -1,51 +1,72 @@
-"""
-Password Utilities Module
-
-This module provides secure password hashing and verification functionality using the passlib library.
-It uses bcrypt as the default hashing algorithm, which is considered cryptographically secure
-and includes salt generation and proper work factors for security.
-
-Example:
-    hashed = get_password_hash("mypassword123")
-    is_valid = verify_password("mypassword123", hashed)  # Returns True
-"""
-
-from passlib.context import CryptContext
-
-# Initialize password hashing context with bcrypt
-# bcrypt is chosen for its security properties:
-# - Includes salt generation
-# - Configurable work factor
-# - Resistant to rainbow table attacks
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    """
-    Hash a password using bcrypt.
-
-    This function takes a plain text password and returns a secure hash using bcrypt.
-    The hash includes the salt and work factor, making it self-contained.
-
-    Args:
-        password (str): The plain text password to hash
-
-    Returns:
-        str: The complete hash string that can be stored in the database
-    """
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify a password against its hash.
-
-    This function safely compares a plain text password against a previously
-    generated hash to determine if they match.
-
-    Args:
-        plain_password (str): The plain text password to verify
-        hashed_password (str): The previously generated hash to check against
-
-    Returns:
-        bool: True if the password matches the hash, False otherwise
-    """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+"""
+Password Utilities Module
+
+This module provides secure password hashing and verification functionality using the bcrypt library.
+bcrypt is considered cryptographically secure and includes salt generation and proper work
+factors for security.
+
+Example:
+    hashed = get_password_hash("mypassword123")
+    is_valid = verify_password("mypassword123", hashed)  # Returns True
+"""
+
+from typing import Union
+
+import bcrypt
+
+# bcrypt is chosen for its security properties:
+# - Includes salt generation
+# - Configurable work factor
+# - Resistant to rainbow table attacks
+# Work factor (log2 of the key expansion rounds) for new hashes, the same
+# default passlib used, so existing hashes keep their cost
+BCRYPT_ROUNDS = 12
+
+# bcrypt only uses the first 72 bytes of a password
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+def _password_bytes(password: Union[str, bytes]) -> bytes:
+    """UTF-8 encoded password (bytes pass through), truncated to the part bcrypt actually uses."""
+    if isinstance(password, str):
+        password = password.encode("utf-8")
+    return password[:BCRYPT_MAX_PASSWORD_BYTES]
+
+def get_password_hash(password: Union[str, bytes]) -> str:
+    """
+    Hash a password using bcrypt.
+
+    This function takes a plain text password and returns a secure hash using bcrypt.
+    The hash includes the salt and work factor, making it self-contained.
+
+    Args:
+        password (str | bytes): The plain text password to hash; bytes are
+            taken as already UTF-8 encoded
+
+    Returns:
+        str: The complete hash string that can be stored in the database
+    """
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("ascii")
+
+def verify_password(plain_password: Union[str, bytes], hashed_password: str) -> bool:
+    """
+    Verify a password against its hash.
+
+    This function safely compares a plain text password against a previously
+    generated hash to determine if they match.
+
+    Args:
+        plain_password (str | bytes): The plain text password to verify; bytes
+            are taken as already UTF-8 encoded
+        hashed_password (str): The previously generated hash to check against
+
+    Returns:
+        bool: True if the password matches the hash, False otherwise
+        
+    Note:
+        The work factor is read from the hash, so hashes created with a
+        different BCRYPT_ROUNDS keep verifying. bcrypt.checkpw compares the
+        derived hash in constant time; do not replace it with an ``==``
+        comparison of hashpw output, which stops at the first differing
+        byte and leaks timing information.
+    """
+    return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode("ascii"))
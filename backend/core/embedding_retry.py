@@ -0,0 +1,46 @@
+"""
+Embedding Retry Module
+
+This module retries rate-limited embedding requests. It is shared by the SQL
+records indexer (backend.sql.sql_embeddings) and the documents indexer
+(backend.documents.doc_indexer), so both back off from HTTP 429 responses
+the same way.
+"""
+
+import asyncio
+import random
+from typing import List
+from langchain_core.embeddings import Embeddings
+from openai import RateLimitError
+
+# Retries after the first attempt, and the delay before the first retry
+EMBEDDING_MAX_RETRIES = 5
+EMBEDDING_RETRY_BASE_SECONDS = 1.0
+
+async def aembed_con_reintentos(embeddings: Embeddings, textos: List[str]) -> List[List[float]]:
+    """
+    Embed texts in one request, retrying it while the API rate-limits it.
+
+    Args:
+        embeddings (Embeddings): Embedding model to call
+        textos (List[str]): Texts to embed
+
+    Returns:
+        List[List[float]]: One embedding per text, in input order
+
+    Raises:
+        RateLimitError: If the request is still rate-limited after
+            EMBEDDING_MAX_RETRIES retries
+
+    Note:
+        The delay doubles on each retry and is stretched by a random
+        factor between 1 and 2, so concurrent requests that were limited
+        together don't retry in lockstep.
+    """
+    for intento in range(EMBEDDING_MAX_RETRIES + 1):
+        try:
+            return await embeddings.aembed_documents(textos)
+        except RateLimitError:
+            if intento == EMBEDDING_MAX_RETRIES:
+                raise
+            await asyncio.sleep(EMBEDDING_RETRY_BASE_SECONDS * 2 ** intento * (1 + random.random()))
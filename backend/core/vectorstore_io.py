@@ -0,0 +1,80 @@
+"""
+Vector Store Storage Module
+
+This module saves vector store directories atomically and repairs them after
+a crash. It is shared by the SQL records index (backend.sql.sql_embeddings)
+and the documents index (backend.documents.doc_indexer).
+
+A save writes the new files to "<ruta>.tmp" and swaps it in with two
+directory renames, keeping the previous version in "<ruta>.old" in between.
+Readers therefore only ever see a complete directory, or none while the swap
+is in progress. A crash between the two renames leaves no directory at all;
+recuperar() puts one back from ".tmp" or ".old".
+
+Saves and recoveries of the same directory are serialized by a lock, and
+recovery must only be run by writers before they load the index: a reader
+running it could move ".tmp" into place while a writer is between its
+renames.
+"""
+
+import os
+import shutil
+import logging
+import threading
+from typing import Callable, Dict, Sequence
+
+logger = logging.getLogger("backend.vectorstore")
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+def _lock(ruta: str) -> threading.Lock:
+    """Get the lock that serializes saves and recoveries of a directory."""
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(ruta), threading.Lock())
+
+def guardar_atomico(ruta: str, escribir: Callable[[str], None]) -> None:
+    """
+    Replace a directory with new contents without leaving it half-written.
+
+    Args:
+        ruta (str): Directory to replace
+        escribir (Callable[[str], None]): Writes the new contents into the
+            directory it receives
+    """
+    tmp_path = ruta + ".tmp"
+    old_path = ruta + ".old"
+    with _lock(ruta):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        escribir(tmp_path)
+
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(ruta):
+            os.replace(ruta, old_path)
+        os.replace(tmp_path, ruta)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+def recuperar(ruta: str, archivos: Sequence[str]) -> None:
+    """
+    Restore a directory if a crash in guardar_atomico left it missing.
+
+    The directory is only missing between the two renames of the swap. At
+    that point the new contents in ".tmp" are already complete, so they are
+    preferred; otherwise the previous version in ".old" is restored.
+
+    Args:
+        ruta (str): Directory saved with guardar_atomico
+        archivos (Sequence[str]): Files a candidate must contain to be
+            considered complete
+
+    Note:
+        Call it only from code that writes the directory, before loading it.
+    """
+    with _lock(ruta):
+        if os.path.exists(ruta):
+            return
+        for candidato in (ruta + ".tmp", ruta + ".old"):
+            if all(os.path.exists(os.path.join(candidato, nombre)) for nombre in archivos):
+                logger.warning("Restoring vector store %s from %s", ruta, candidato)
+                os.replace(candidato, ruta)
+                return
@@ -1,3 +1,3 @@
-"""
-Database package initialization.
+"""
+Database package initialization.
 """
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Database Migration Script
+
+This script brings an existing database up to the current SQLAlchemy models
+without dropping any table, so it can be run against a database that already
+holds users, conversations and query history.
+
+It:
+1. Creates the tables that don't exist yet
+2. Adds the columns and indexes the models gained since the table was created
+3. Converts the data stored in the old format to the new columns
+
+Every step checks the current schema first, so running the script again on
+an up-to-date database changes nothing. Old columns are left in place.
+
+Usage:
+    python migrate.py
+
+Environment Variables:
+    DATABASE_URL: Database connection string (from .env file)
+"""
+
+import sys
+import os
+from dotenv import load_dotenv
+
+# Load environment variables before any database operations
+load_dotenv()
+
+# Add the project root to Python path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import Column, Integer, cast, column, inspect, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from backend.db.database import engine, Base
+# Imported so that every model is registered in Base.metadata
+import backend.auth.models  # noqa: F401
+from backend.logs.logger import RegistroConsulta
+from backend.models.analytics import Feedback, Query, ResponseBlob, Topic
+
+# Old queries rows moved to response_blobs per round trip
+MIGRACION_LOTE = 500
+
+def _columnas(conn: Connection, tabla: str) -> set:
+    """
+    Get the names of the columns a table has in the database.
+
+    Args:
+        conn (Connection): Database connection
+        tabla (str): Table name
+
+    Returns:
+        set: Column names
+    """
+    return {c["name"] for c in inspect(conn).get_columns(tabla)}
+
+def _añadir_columna(conn: Connection, columna: Column) -> bool:
+    """
+    Add a model column to its table if the database doesn't have it yet.
+
+    The column is added as nullable, with its foreign key if it has one.
+
+    Args:
+        conn (Connection): Database connection
+        columna (Column): Model column, e.g. Query.__table__.c.topic_id
+
+    Returns:
+        bool: True if the column was added
+    """
+    if columna.name in _columnas(conn, columna.table.name):
+        return False
+    preparer = conn.dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(columna.table)} "
+        f"ADD {preparer.format_column(columna)} {columna.type.compile(dialect=conn.dialect)} NULL"
+    )
+    for fk in columna.foreign_keys:
+        ddl += f" REFERENCES {preparer.format_table(fk.column.table)} ({preparer.format_column(fk.column)})"
+    conn.execute(text(ddl))
+    return True
+
+def _crear_indices(conn: Connection, tabla) -> None:
+    """
+    Create the model indexes a table doesn't have yet.
+
+    Indexes over columns the table doesn't have yet are left for the step
+    that adds those columns.
+
+    Args:
+        conn (Connection): Database connection
+        tabla (Table): Model table
+    """
+    existentes = {i["name"] for i in inspect(conn).get_indexes(tabla.name)}
+    columnas = _columnas(conn, tabla.name)
+    for indice in tabla.indexes:
+        if indice.name not in existentes and {c.name for c in indice.columns} <= columnas:
+            indice.create(conn)
+
+def _id_topic(conn: Connection, nombre: str) -> int:
+    """
+    Get the id of a topic, inserting it if it doesn't exist yet.
+
+    Args:
+        conn (Connection): Database connection
+        nombre (str): Topic name
+
+    Returns:
+        int: Topic id
+    """
+    topics = Topic.__table__
+    id_topic = conn.execute(topics.select().with_only_columns(topics.c.id).where(topics.c.name == nombre)).scalar()
+    if id_topic is None:
+        id_topic = conn.execute(topics.insert().values(name=nombre)).inserted_primary_key[0]
+    return id_topic
+
+def migrar_queries(conn: Connection) -> None:
+    """
+    Migrate the queries table to small feedback and topic keys.
+
+    Before, queries stored feedback as 'positive'/'negative'/'neutral',
+    the JSON with the answer sources in topic and the response time in
+    seconds in response_time. This:
+    - adds topic_id, fuente and response_time_ms
+    - copies the sources to fuente and classifies each old query under the
+      topic that answered it (error, embeddings, sql or documentos)
+    - converts response_time to milliseconds
+    - replaces the feedback labels with their numbers (and turns the column
+      into SMALLINT on SQL Server)
+    - creates the ix_q_* indexes
+
+    Args:
+        conn (Connection): Database connection, inside a transaction
+    """
+    c = Query.__table__.c
+    for columna in (c.topic_id, c.fuente, c.response_time_ms):
+        _añadir_columna(conn, columna)
+
+    existentes = _columnas(conn, "queries")
+    antigua = table("queries", *(column(n) for n in existentes))
+    q = antigua.c
+
+    if "topic" in existentes:
+        conn.execute(antigua.update().where(q.fuente.is_(None)).values(fuente=q.topic))
+        # Same classification as query_routes._clasificar_topic, for rows
+        # written before topic_id existed
+        pendientes = q.topic_id.is_(None) & q.topic.isnot(None)
+        clasificacion = [("error", q.topic.like('{"error"%'))]
+        if "sql_generado" in existentes:
+            clasificacion += [
+                ("embeddings", q.sql_generado == "Consulta respondida usando embeddings"),
+                ("sql", q.sql_generado.isnot(None) & (q.sql_generado != "")),
+            ]
+        clasificacion.append(("documentos", None))
+        for nombre, condicion in clasificacion:
+            filtro = pendientes if condicion is None else pendientes & condicion
+            conn.execute(antigua.update().where(filtro).values(topic_id=_id_topic(conn, nombre)))
+
+    if "response_time" in existentes:
+        conn.execute(
+            antigua.update()
+            .where(q.response_time_ms.is_(None) & q.response_time.isnot(None))
+            .values(response_time_ms=cast(q.response_time * 1000, Integer))
+        )
+
+    tipo_feedback = next(col["type"] for col in inspect(conn).get_columns("queries") if col["name"] == "feedback")
+    if not isinstance(tipo_feedback, Integer):
+        for feedback in Feedback:
+            conn.execute(antigua.update().where(q.feedback == feedback.label).values(feedback=str(feedback.value)))
+        # SQLite can't change a column type; FeedbackType reads the numbers
+        # stored as text there
+        if conn.dialect.name == "mssql":
+            conn.execute(text("ALTER TABLE queries ALTER COLUMN feedback SMALLINT NULL"))
+
+    _crear_indices(conn, Query.__table__)
+
+def migrar_response_blobs(conn: Connection) -> None:
+    """
+    Move query responses and generated SQL into response_blobs.
+
+    Before, queries stored the response and the generated SQL inline in
+    response and sql_generado. This adds response_hash and sql_hash, stores
+    each old text once in response_blobs and points the rows at it. It also
+    adds logs_consultas.cache_read_input_tokens.
+
+    Args:
+        conn (Connection): Database connection, inside a transaction
+    """
+    c = Query.__table__.c
+    for columna in (c.response_hash, c.sql_hash, RegistroConsulta.__table__.c.cache_read_input_tokens):
+        _añadir_columna(conn, columna)
+
+    existentes = _columnas(conn, "queries")
+    destino = {"response": "response_hash", "sql_generado": "sql_hash"}
+    textos = [n for n in destino if n in existentes]
+    if textos:
+        antigua = table("queries", *(column(n) for n in existentes))
+        q = antigua.c
+        pendientes = or_(*(q[n].isnot(None) & q[destino[n]].is_(None) for n in textos))
+        ultimo = 0
+        # Paged by id so large tables aren't read into memory at once
+        with Session(bind=conn) as db:
+            while True:
+                filas = conn.execute(
+                    select(q.id, *(q[n] for n in textos))
+                    .where(pendientes & (q.id > ultimo))
+                    .order_by(q.id)
+                    .limit(MIGRACION_LOTE)
+                ).all()
+                if not filas:
+                    break
+                for fila in filas:
+                    valores = {
+                        destino[n]: ResponseBlob.guardar(db, fila._mapping[n])
+                        for n in textos if fila._mapping[n] is not None
+                    }
+                    conn.execute(antigua.update().where(q.id == fila.id).values(**valores))
+                ultimo = filas[-1].id
+
+    _crear_indices(conn, Query.__table__)
+
+def migrar(bind=None) -> None:
+    """
+    Bring the database schema and data up to the current models.
+
+    Args:
+        bind (Engine, optional): Engine to migrate. Defaults to the
+            application engine.
+
+    Note:
+        Runs in a single transaction; if a step fails nothing is changed.
+    """
+    with (bind or engine).begin() as conn:
+        # Only creates the tables that are missing (topics, response_blobs, ...)
+        Base.metadata.create_all(bind=conn)
+        migrar_queries(conn)
+        migrar_response_blobs(conn)
+
+if __name__ == "__main__":
+    migrar()
+    print("Database migrated successfully!")
@@ -1,393 +1,617 @@
-"""
-Document Indexing and Processing Module
-
-This module handles document processing, indexing, and retrieval using vector embeddings.
-It supports multiple document types (PDF, Word) and provides functionality for:
-- Document validation and configuration
-- Text extraction and chunking
-- Vector embedding generation
-- Similarity search
-- Document management
-
-The module uses:
-- LangChain for document loading and processing
-- FAISS for vector storage and similarity search
-- OpenAI embeddings for vector generation
-- SQLAlchemy for configuration management
-
-Key Features:
-- Configurable document processing settings
-- Recursive directory processing
-- Chunk-based text splitting
-- Vector-based similarity search
-- Document deletion and management
-"""
-
-import os
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain.docstore.document import Document
-from typing import List, Tuple, Optional
-from datetime import datetime
-from backend.db.database import get_db
-from backend.auth.models import DocumentConfig, DocumentRecord, DocumentLog, User
-from backend.logs.logger import registrar_accion_admin
-from sqlalchemy.orm import Session
-
-def create_document_record(db: Session, filepath: str, user_id: int) -> DocumentRecord:
-    """
-    Create a new document record in the database.
-    
-    Args:
-        db (Session): Database session
-        filepath (str): Path to the document file
-        user_id (int): ID of the user uploading the document
-        
-    Returns:
-        DocumentRecord: Created document record
-    """
-    filename = os.path.basename(filepath)
-    file_size = os.path.getsize(filepath)
-    file_type = os.path.splitext(filepath)[1].lower()
-    
-    record = DocumentRecord(
-        filename=filename,
-        file_path=filepath,
-        file_size=file_size,
-        file_type=file_type,
-        uploaded_by=user_id
-    )
-    
-    db.add(record)
-    db.commit()
-    db.refresh(record)
-    
-    # Log the upload
-    log = DocumentLog(
-        document_id=record.id,
-        user_id=user_id,
-        action="upload",
-        details=f"File uploaded: {filename} ({file_size} bytes)"
-    )
-    db.add(log)
-    db.commit()
-    
-    # Add admin log
-    registrar_accion_admin(
-        usuario=db.query(User).filter_by(id=user_id).first().username,
-        accion="create",
-        modulo="documents",
-        detalles={
-            "filename": filename,
-            "file_size": file_size,
-            "file_type": file_type,
-            "document_id": record.id
-        }
-    )
-    
-    return record
-
-def update_document_record(db: Session, record: DocumentRecord, is_indexed: bool = False,
-                         is_deleted: bool = False, user_id: Optional[int] = None) -> None:
-    """
-    Update a document record and log the changes.
-    
-    Args:
-        db (Session): Database session
-        record (DocumentRecord): Document record to update
-        is_indexed (bool): Whether the document is indexed
-        is_deleted (bool): Whether the document is deleted
-        user_id (int): ID of the user making the change
-    """
-    changes = []
-    if is_indexed != record.is_indexed:
-        record.is_indexed = is_indexed
-        changes.append("indexed" if is_indexed else "unindexed")
-    
-    if is_deleted != record.is_deleted:
-        record.is_deleted = is_deleted
-        changes.append("deleted" if is_deleted else "restored")
-    
-    if changes:
-        record.last_modified = datetime.utcnow()
-        db.commit()
-        
-        if user_id:
-            log = DocumentLog(
-                document_id=record.id,
-                user_id=user_id,
-                action=changes[0],
-                details=f"Document {', '.join(changes)}: {record.filename}"
-            )
-            db.add(log)
-            db.commit()
-            
-            # Add admin log
-            user = db.query(User).filter_by(id=user_id).first()
-            registrar_accion_admin(
-                usuario=user.username,
-                accion=changes[0],
-                modulo="documents",
-                detalles={
-                    "document_id": record.id,
-                    "filename": record.filename,
-                    "changes": changes,
-                    "is_indexed": record.is_indexed,
-                    "is_deleted": record.is_deleted
-                }
-            )
-
-# Constants
-VECTORSTORE_PATH = "./vectorstore/documents"
-
-# Initialize embeddings with API key
-embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("LLM_API_KEY"))
-
-def get_document_config(db: Session) -> DocumentConfig:
-    """
-    Retrieve or create document processing configuration.
-    
-    Args:
-        db (Session): Database session
-        
-    Returns:
-        DocumentConfig: Configuration object with processing settings
-        
-    Note:
-        Creates default configuration if none exists in database
-    """
-    config = db.query(DocumentConfig).first()
-    if not config:
-        # Create default configuration if none exists
-        config = DocumentConfig()
-        db.add(config)
-        db.commit()
-        db.refresh(config)
-    return config
-
-def is_valid_file(filepath: str, config: DocumentConfig) -> bool:
-    """
-    Validate a file against configuration settings.
-    
-    Args:
-        filepath (str): Path to the file to validate
-        config (DocumentConfig): Configuration settings
-        
-    Returns:
-        bool: True if file is valid, False otherwise
-        
-    Checks:
-        - File extension against allowed extensions
-        - File size against maximum size limit
-    """
-    # Check extension
-    ext = os.path.splitext(filepath)[1].lower()
-    allowed_extensions = [ext.strip().lower() for ext in config.allowed_extensions.split(",")]
-    
-    if ext not in allowed_extensions:
-        return False
-    
-    # Check size
-    file_size_mb = os.path.getsize(filepath) / (1024 * 1024)
-    if file_size_mb > config.max_file_size:
-        return False
-    
-    return True
-
-def procesar_archivo(ruta: str) -> List[Document]:
-    """
-    Process a single file and extract its content.
-    
-    Args:
-        ruta (str): Path to the file to process
-        
-    Returns:
-        List[Document]: List of LangChain documents with extracted content
-        
-    Supports:
-        - PDF files (.pdf)
-        - Word documents (.doc, .docx)
-    """
-    ext = os.path.splitext(ruta)[1].lower()
-    if ext == ".pdf":
-        loader = PyPDFLoader(ruta)
-    elif ext in [".doc", ".docx"]:
-        loader = UnstructuredWordDocumentLoader(ruta)
-    else:
-        return []
-
-    docs = loader.load()
-    archivo = os.path.basename(ruta)
-    for doc in docs:
-        doc.metadata["source"] = archivo
-    return docs
-
-def cargar_y_indexar_documentos(directorio: str, user_id: int, recursivo: bool = False, db: Session = None) -> Tuple[str, List[str]]:
-    """
-    Load and index documents from a directory.
-    
-    This function processes documents, splits them into chunks,
-    generates embeddings, and stores them in a FAISS vector store.
-    
-    Args:
-        directorio (str): Directory path containing documents
-        user_id (int): ID of the user uploading documents
-        recursivo (bool): Whether to process subdirectories
-        db (Session): Database session
-        
-    Returns:
-        Tuple[str, List[str]]: (Status message, List of processed files)
-        
-    Process:
-        1. Validate and load documents
-        2. Split text into chunks
-        3. Generate embeddings
-        4. Store in FAISS index
-    """
-    if db is None:
-        db = next(get_db())
-
-    documentos: List[Document] = []
-    archivos_procesados: List[str] = []
-    config = get_document_config(db)
-    archivos_encontrados = 0
-    
-    def procesar_directorio(dir_path: str):
-        nonlocal archivos_encontrados
-        for root, _, files in os.walk(dir_path):
-            for archivo in files:
-                archivos_encontrados += 1
-                if archivos_encontrados > config.max_files_per_upload:
-                    return
-                
-                ruta = os.path.join(root, archivo)
-                if is_valid_file(ruta, config):
-                    # Create document record
-                    record = create_document_record(db, ruta, user_id)
-                    
-                    docs = procesar_archivo(ruta)
-                    if docs:
-                        documentos.extend(docs)
-                        archivos_procesados.append(archivo)
-                        # Update record as indexed
-                        update_document_record(db, record, is_indexed=True, user_id=user_id)
-            if not recursivo:
-                break
-
-    procesar_directorio(directorio)
-
-    if archivos_encontrados > config.max_files_per_upload:
-        return f"Se excedió el límite de {config.max_files_per_upload} archivos por carga.", []
-
-    if not documentos:
-        return "No se encontraron documentos válidos.", []
-
-    # Split documents into chunks for better processing
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-    chunks = splitter.split_documents(documentos)
-
-    # Update or create vector store
-    if os.path.exists(VECTORSTORE_PATH):
-        vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
-        vectorstore.add_documents(chunks)
-    else:
-        vectorstore = FAISS.from_documents(chunks, embeddings)
-
-    vectorstore.save_local(VECTORSTORE_PATH)
-    return f"{len(chunks)} fragmentos indexados con éxito.", archivos_procesados
-
-def recuperar_contexto_desde_documentos(pregunta: str, k: int = 5) -> str:
-    """
-    Retrieve relevant context from indexed documents.
-    
-    Args:
-        pregunta (str): Query to search for
-        k (int): Number of relevant chunks to retrieve
-        
-    Returns:
-        str: Combined context from relevant document chunks
-        
-    Note:
-        Uses FAISS similarity search to find relevant text chunks
-    """
-    if not os.path.exists(VECTORSTORE_PATH):
-        return "No hay documentos indexados."
-
-    vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
-    docs = vectorstore.similarity_search(pregunta, k=k)
-    contexto = "\n".join([doc.page_content for doc in docs])
-    return contexto
-
-def eliminar_documento_indexado(nombre: str, user_id: int, db: Session = None) -> None:
-    """
-    Remove a document from the vector store and update records.
-    
-    Args:
-        nombre (str): Name of the file to remove
-        user_id (int): ID of the user deleting the document
-        db (Session): Database session
-        
-    Raises:
-        Exception: If there's an error manipulating the vector store
-        
-    Process:
-        1. Update document record as deleted
-        2. Load vector store
-        3. Filter out documents matching the filename
-        4. Create new vector store with remaining documents
-        5. Save updated vector store
-    """
-    if db is None:
-        db = next(get_db())
-        
-    if not os.path.exists(VECTORSTORE_PATH):
-        # Log attempt to delete from non-existent vectorstore
-        user = db.query(User).filter_by(id=user_id).first()
-        registrar_accion_admin(
-            usuario=user.username,
-            accion="delete",
-            modulo="documents",
-            detalles={
-                "filename": nombre,
-                "status": "Vector store does not exist"
-            }
-        )
-        return
-        
-    try:
-        # Find and update the document record
-        nombre_decodificado = os.path.basename(nombre)
-        record = db.query(DocumentRecord).filter_by(filename=nombre_decodificado).first()
-        
-        if record:
-            # Update record as deleted
-            update_document_record(db, record, is_deleted=True, user_id=user_id)
-            
-        vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
-        
-        # Get just the filename without path
-        from urllib.parse import unquote
-        nombre_decodificado = unquote(nombre)
-        nombre_archivo = os.path.basename(nombre_decodificado)
-        
-        documentos_actualizados = []
-        for doc in vectorstore.docstore._dict.values():
-            # Verify metadata and source exist before comparing
-            if (not hasattr(doc, 'metadata') or
-                'source' not in doc.metadata or
-                doc.metadata['source'] != nombre_archivo):
-                documentos_actualizados.append(doc)
-
-        if not documentos_actualizados:
-            # If no documents remain, remove the vector store directory
-            import shutil
-            shutil.rmtree(VECTORSTORE_PATH)
-            return
-
-        nuevo_vectorstore = FAISS.from_documents(documentos_actualizados, embeddings)
-        nuevo_vectorstore.save_local(VECTORSTORE_PATH)
-        
-    except Exception as e:
+"""
+Document Indexing and Processing Module
+
+This module handles document processing, indexing, and retrieval using vector embeddings.
+It supports multiple document types (PDF, Word) and provides functionality for:
+- Document validation and configuration
+- Text extraction and chunking
+- Vector embedding generation
+- Similarity search
+- Document management
+
+The module uses:
+- LangChain for document loading and processing
+- FAISS for vector storage and similarity search (optionally int8/PQ quantized)
+- OpenAI embeddings for vector generation
+- SQLAlchemy for configuration management
+
+Key Features:
+- Configurable document processing settings
+- Recursive directory processing
+- Chunk-based text splitting
+- Vector-based similarity search
+- Document deletion and management
+- SQLite chunk store so searches don't unpickle the LangChain docstore
+"""
+
+import os
+import shutil
+import sqlite3
+import asyncio
+import faiss
+import numpy as np
+from langchain_community.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_openai import OpenAIEmbeddings
+from langchain.docstore.document import Document
+from functools import lru_cache
+from typing import List, Tuple, Optional
+from datetime import datetime
+from backend.db.database import get_db
+from backend.auth.models import DocumentConfig, DocumentRecord, DocumentLog, User
+from backend.logs.logger import registrar_accion_admin
+from backend.core.vectorstore_io import guardar_atomico, recuperar
+from backend.core.embedding_retry import aembed_con_reintentos
+from sqlalchemy.orm import Session
+
+def create_document_record(db: Session, filepath: str, user_id: int) -> DocumentRecord:
+    """
+    Create a new document record in the database.
+    
+    Args:
+        db (Session): Database session
+        filepath (str): Path to the document file
+        user_id (int): ID of the user uploading the document
+        
+    Returns:
+        DocumentRecord: Created document record
+    """
+    filename = os.path.basename(filepath)
+    file_size = os.path.getsize(filepath)
+    file_type = os.path.splitext(filepath)[1].lower()
+    
+    record = DocumentRecord(
+        filename=filename,
+        file_path=filepath,
+        file_size=file_size,
+        file_type=file_type,
+        uploaded_by=user_id
+    )
+    
+    db.add(record)
+    db.commit()
+    db.refresh(record)
+    
+    # Log the upload
+    log = DocumentLog(
+        document_id=record.id,
+        user_id=user_id,
+        action="upload",
+        details=f"File uploaded: {filename} ({file_size} bytes)"
+    )
+    db.add(log)
+    db.commit()
+    
+    # Add admin log
+    registrar_accion_admin(
+        usuario=db.query(User).filter_by(id=user_id).first().username,
+        accion="create",
+        modulo="documents",
+        detalles={
+            "filename": filename,
+            "file_size": file_size,
+            "file_type": file_type,
+            "document_id": record.id
+        }
+    )
+    
+    return record
+
+def update_document_record(db: Session, record: DocumentRecord, is_indexed: bool = False,
+                         is_deleted: bool = False, user_id: Optional[int] = None) -> None:
+    """
+    Update a document record and log the changes.
+    
+    Args:
+        db (Session): Database session
+        record (DocumentRecord): Document record to update
+        is_indexed (bool): Whether the document is indexed
+        is_deleted (bool): Whether the document is deleted
+        user_id (int): ID of the user making the change
+    """
+    changes = []
+    if is_indexed != record.is_indexed:
+        record.is_indexed = is_indexed
+        changes.append("indexed" if is_indexed else "unindexed")
+    
+    if is_deleted != record.is_deleted:
+        record.is_deleted = is_deleted
+        changes.append("deleted" if is_deleted else "restored")
+    
+    if changes:
+        record.last_modified = datetime.utcnow()
+        db.commit()
+        
+        if user_id:
+            log = DocumentLog(
+                document_id=record.id,
+                user_id=user_id,
+                action=changes[0],
+                details=f"Document {', '.join(changes)}: {record.filename}"
+            )
+            db.add(log)
+            db.commit()
+            
+            # Add admin log
+            user = db.query(User).filter_by(id=user_id).first()
+            registrar_accion_admin(
+                usuario=user.username,
+                accion=changes[0],
+                modulo="documents",
+                detalles={
+                    "document_id": record.id,
+                    "filename": record.filename,
+                    "changes": changes,
+                    "is_indexed": record.is_indexed,
+                    "is_deleted": record.is_deleted
+                }
+            )
+
+# Constants
+VECTORSTORE_PATH = "./vectorstore/documents"
+CHUNKS_DB_NAME = "chunks.sqlite"  # Chunk text keyed by FAISS position
+
+# Vector index encodings selectable through DocumentConfig.quantization
+# - flat: raw float32 vectors (exact search)
+# - sq8: 8-bit scalar quantization, 4x smaller than flat
+# - pq: product quantization, smallest footprint but needs more training data
+QUANTIZATION_TYPES = ("flat", "sq8", "pq")
+PQ_SUBQUANTIZERS = 96  # 1536-d OpenAI embeddings -> 16 dims per sub-quantizer
+PQ_MIN_TRAINING = 256  # 2^8 centroids per sub-quantizer
+TRAINING_SAMPLE_SIZE = 10000
+
+# Embedding requests: chunks are sent in batches, several batches in flight
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_CONCURRENCY = 8
+
+# Initialize embeddings with API key
+embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("LLM_API_KEY"))
+
+async def _embed_en_paralelo(textos: List[str]) -> List[List[float]]:
+    """
+    Embed texts in concurrent batches, bounded by EMBEDDING_CONCURRENCY.
+    
+    Rate-limited batches (HTTP 429) are retried as described in
+    backend.core.embedding_retry. Results keep the order of the input texts.
+    """
+    semaforo = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+    async def embed(lote: List[str]) -> List[List[float]]:
+        async with semaforo:
+            return await aembed_con_reintentos(embeddings, lote)
+
+    lotes = [textos[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(textos), EMBEDDING_BATCH_SIZE)]
+    resultados = await asyncio.gather(*(embed(lote) for lote in lotes))
+    return [vector for resultado in resultados for vector in resultado]
+
+def embed_textos(textos: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for a list of texts using concurrent API requests.
+    
+    Args:
+        textos (List[str]): Texts to embed
+        
+    Returns:
+        List[List[float]]: One embedding per text, in input order
+        
+    Note:
+        Runs its own event loop, so it must be called from synchronous
+        code (e.g. a regular `def` FastAPI route running in the threadpool).
+    """
+    return asyncio.run(_embed_en_paralelo(textos))
+
+def construir_indice(vectores: np.ndarray, quantization: str = "flat") -> faiss.Index:
+    """
+    Build a trained, empty FAISS index for the given quantization type.
+    
+    Args:
+        vectores (np.ndarray): float32 matrix of embeddings used for training
+            (a random sample of TRAINING_SAMPLE_SIZE rows when larger)
+        quantization (str): One of QUANTIZATION_TYPES
+        
+    Returns:
+        faiss.Index: Index ready to receive vectors
+        
+    Note:
+        PQ falls back to SQ8 when there are too few vectors to train
+        the codebooks; unknown values fall back to a flat index.
+    """
+    dimension = vectores.shape[1]
+    if quantization == "pq" and (len(vectores) < PQ_MIN_TRAINING or dimension % PQ_SUBQUANTIZERS):
+        quantization = "sq8"
+
+    if quantization == "sq8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    elif quantization == "pq":
+        index = faiss.IndexPQ(dimension, PQ_SUBQUANTIZERS, 8, faiss.METRIC_L2)
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    if not index.is_trained:
+        if len(vectores) > TRAINING_SAMPLE_SIZE:
+            # Random rows, so every document in the batch is represented
+            muestra = np.random.default_rng().choice(len(vectores), TRAINING_SAMPLE_SIZE, replace=False)
+            vectores = vectores[np.sort(muestra)]
+        index.train(vectores)
+    return index
+
+def crear_vectorstore(chunks: List[Document], quantization: str = "flat") -> FAISS:
+    """
+    Create a FAISS vector store for the given chunks.
+    
+    Args:
+        chunks (List[Document]): Document chunks to index
+        quantization (str): Index encoding, see QUANTIZATION_TYPES
+        
+    Returns:
+        FAISS: Vector store containing the embedded chunks
+    """
+    textos = [chunk.page_content for chunk in chunks]
+    vectores = embed_textos(textos)
+    index = construir_indice(np.asarray(vectores, dtype=np.float32), quantization)
+
+    vectorstore = FAISS(embeddings, index, InMemoryDocstore(), {})
+    vectorstore.add_embeddings(
+        list(zip(textos, vectores)),
+        metadatas=[chunk.metadata for chunk in chunks]
+    )
+    return vectorstore
+
+def agregar_chunks(vectorstore: FAISS, chunks: List[Document]) -> None:
+    """
+    Embed chunks concurrently and add them to an existing vector store.
+    
+    Args:
+        vectorstore (FAISS): Vector store to extend
+        chunks (List[Document]): Document chunks to add
+    """
+    textos = [chunk.page_content for chunk in chunks]
+    vectorstore.add_embeddings(
+        list(zip(textos, embed_textos(textos))),
+        metadatas=[chunk.metadata for chunk in chunks]
+    )
+
+def guardar_chunks(vectorstore: FAISS, directorio: Optional[str] = None) -> None:
+    """
+    Write the chunk texts of a vector store to its SQLite chunk store.
+    
+    Args:
+        vectorstore (FAISS): Vector store whose chunks are persisted
+        directorio (str, optional): Directory of the saved index,
+            VECTORSTORE_PATH by default
+        
+    Note:
+        Rows are keyed by FAISS position so a search result can be
+        resolved to its text with a single primary-key lookup. The store
+        is written to a temporary file and renamed into place, so readers
+        never see a partially written one.
+    """
+    filas = [
+        (posicion, vectorstore.docstore.search(doc_id).page_content)
+        for posicion, doc_id in vectorstore.index_to_docstore_id.items()
+    ]
+    ruta = os.path.join(directorio or VECTORSTORE_PATH, CHUNKS_DB_NAME)
+    tmp_ruta = ruta + ".tmp"
+    if os.path.exists(tmp_ruta):
+        os.remove(tmp_ruta)
+    conn = sqlite3.connect(tmp_ruta)
+    try:
+        with conn:
+            conn.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, text TEXT)")
+            conn.executemany("INSERT INTO chunks (id, text) VALUES (?, ?)", filas)
+    finally:
+        conn.close()
+    os.replace(tmp_ruta, ruta)
+
+def guardar_vectorstore(vectorstore: FAISS) -> None:
+    """
+    Save a vector store to disk together with its SQLite chunk store.
+    
+    The index and the chunk store are swapped in together (see
+    backend.core.vectorstore_io), so a crash never leaves chunk texts
+    pointing at the FAISS positions of a different index.
+    
+    Args:
+        vectorstore (FAISS): Vector store to save
+    """
+    def escribir(directorio: str) -> None:
+        vectorstore.save_local(directorio)
+        guardar_chunks(vectorstore, directorio)
+
+    guardar_atomico(VECTORSTORE_PATH, escribir)
+
+def _recuperar_vectorstore() -> None:
+    """
+    Restore VECTORSTORE_PATH if a crash in guardar_vectorstore left it missing.
+    
+    Note:
+        Only the functions that write the index call it, before loading it.
+    """
+    recuperar(VECTORSTORE_PATH, ("index.faiss", "index.pkl", CHUNKS_DB_NAME))
+
+@lru_cache(maxsize=1)
+def _cargar_indice(mtime_ns: int) -> faiss.Index:
+    """
+    Read the raw FAISS index from disk.
+    
+    Args:
+        mtime_ns (int): Modification time of index.faiss, used only as the
+            cache key so a rewritten index invalidates the result
+            
+    Returns:
+        faiss.Index: Loaded index
+    """
+    return faiss.read_index(os.path.join(VECTORSTORE_PATH, "index.faiss"))
+
+def get_document_config(db: Session) -> DocumentConfig:
+    """
+    Retrieve or create document processing configuration.
+    
+    Args:
+        db (Session): Database session
+        
+    Returns:
+        DocumentConfig: Configuration object with processing settings
+        
+    Note:
+        Creates default configuration if none exists in database
+    """
+    config = db.query(DocumentConfig).first()
+    if not config:
+        # Create default configuration if none exists
+        config = DocumentConfig()
+        db.add(config)
+        db.commit()
+        db.refresh(config)
+    return config
+
+def is_valid_file(filepath: str, config: DocumentConfig) -> bool:
+    """
+    Validate a file against configuration settings.
+    
+    Args:
+        filepath (str): Path to the file to validate
+        config (DocumentConfig): Configuration settings
+        
+    Returns:
+        bool: True if file is valid, False otherwise
+        
+    Checks:
+        - File extension against allowed extensions
+        - File size against maximum size limit
+    """
+    # Check extension
+    ext = os.path.splitext(filepath)[1].lower()
+    allowed_extensions = [ext.strip().lower() for ext in config.allowed_extensions.split(",")]
+    
+    if ext not in allowed_extensions:
+        return False
+    
+    # Check size
+    file_size_mb = os.path.getsize(filepath) / (1024 * 1024)
+    if file_size_mb > config.max_file_size:
+        return False
+    
+    return True
+
+def procesar_archivo(ruta: str) -> List[Document]:
+    """
+    Process a single file and extract its content.
+    
+    Args:
+        ruta (str): Path to the file to process
+        
+    Returns:
+        List[Document]: List of LangChain documents with extracted content
+        
+    Supports:
+        - PDF files (.pdf)
+        - Word documents (.doc, .docx)
+    """
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext == ".pdf":
+        loader = PyPDFLoader(ruta)
+    elif ext in [".doc", ".docx"]:
+        loader = UnstructuredWordDocumentLoader(ruta)
+    else:
+        return []
+
+    docs = loader.load()
+    archivo = os.path.basename(ruta)
+    for doc in docs:
+        doc.metadata["source"] = archivo
+    return docs
+
+def cargar_y_indexar_documentos(directorio: str, user_id: int, recursivo: bool = False, db: Session = None) -> Tuple[str, List[str]]:
+    """
+    Load and index documents from a directory.
+    
+    This function processes documents, splits them into chunks,
+    generates embeddings, and stores them in a FAISS vector store.
+    
+    Args:
+        directorio (str): Directory path containing documents
+        user_id (int): ID of the user uploading documents
+        recursivo (bool): Whether to process subdirectories
+        db (Session): Database session
+        
+    Returns:
+        Tuple[str, List[str]]: (Status message, List of processed files)
+        
+    Process:
+        1. List the files and reject the upload if there are too many
+        2. Validate each document and split it into chunks
+        3. Load the existing FAISS index (if any) once
+        4. Embed all chunks together and add them to the index in memory
+        5. Save the FAISS index once at the end
+    """
+    if db is None:
+        db = next(get_db())
+
+    config = get_document_config(db)
+
+    # List the files first so an upload over the limit is rejected before
+    # any record is created or any embedding request is paid for
+    rutas: List[str] = []
+    for root, _, files in os.walk(directorio):
+        rutas.extend(os.path.join(root, archivo) for archivo in files)
+        if not recursivo:
+            break
+    if len(rutas) > config.max_files_per_upload:
+        return f"Se excedió el límite de {config.max_files_per_upload} archivos por carga.", []
+
+    # Split documents into chunks for better processing
+    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
+
+    archivos_procesados: List[str] = []
+    registros: List[DocumentRecord] = []
+    chunks: List[Document] = []
+    for ruta in rutas:
+        if is_valid_file(ruta, config):
+            # Create document record
+            record = create_document_record(db, ruta, user_id)
+            
+            docs = procesar_archivo(ruta)
+            if docs:
+                chunks.extend(splitter.split_documents(docs))
+                archivos_procesados.append(os.path.basename(ruta))
+                registros.append(record)
+
+    if not chunks:
+        return "No se encontraron documentos válidos.", []
+
+    # Load the vector store once for the whole job. An existing index keeps
+    # the encoding it was created with; a new one is trained on the chunks
+    # of every file in the upload, not just the first
+    vectorstore: Optional[FAISS] = None
+    _recuperar_vectorstore()
+    if os.path.exists(VECTORSTORE_PATH):
+        vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
+    if vectorstore is None:
+        vectorstore = crear_vectorstore(chunks, config.quantization)
+    else:
+        agregar_chunks(vectorstore, chunks)
+    guardar_vectorstore(vectorstore)
+
+    # Mark the records as indexed once their chunks are saved
+    for record in registros:
+        update_document_record(db, record, is_indexed=True, user_id=user_id)
+    return f"{len(chunks)} fragmentos indexados con éxito.", archivos_procesados
+
+def recuperar_contexto_desde_documentos(pregunta: str, k: int = 5) -> str:
+    """
+    Retrieve relevant context from indexed documents.
+    
+    Args:
+        pregunta (str): Query to search for
+        k (int): Number of relevant chunks to retrieve
+        
+    Returns:
+        str: Combined context from relevant document chunks
+        
+    Note:
+        Searches the raw FAISS index and resolves hits through the SQLite
+        chunk store, so only the matching texts are read. The loaded index
+        is cached until index.faiss is rewritten. Indexes created before
+        the chunk store existed fall back to the LangChain loader once and
+        get their chunk store written.
+    """
+    if not os.path.exists(VECTORSTORE_PATH):
+        return "No hay documentos indexados."
+
+    chunks_db = os.path.join(VECTORSTORE_PATH, CHUNKS_DB_NAME)
+    if not os.path.exists(chunks_db):
+        vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
+        guardar_chunks(vectorstore)
+        docs = vectorstore.similarity_search(pregunta, k=k)
+        return "\n".join([doc.page_content for doc in docs])
+
+    index = _cargar_indice(os.stat(os.path.join(VECTORSTORE_PATH, "index.faiss")).st_mtime_ns)
+    vector = np.asarray([embeddings.embed_query(pregunta)], dtype=np.float32)
+    _, posiciones = index.search(vector, k)
+    ids = [int(i) for i in posiciones[0] if i != -1]
+    if not ids:
+        return ""
+
+    conn = sqlite3.connect(chunks_db)
+    try:
+        placeholders = ",".join("?" * len(ids))
+        textos = dict(conn.execute(f"SELECT id, text FROM chunks WHERE id IN ({placeholders})", ids))
+    finally:
+        conn.close()
+    return "\n".join(textos[i] for i in ids if i in textos)
+
+def eliminar_documento_indexado(nombre: str, user_id: int, db: Session = None) -> None:
+    """
+    Remove a document from the vector store and update records.
+    
+    Args:
+        nombre (str): Name of the file to remove
+        user_id (int): ID of the user deleting the document
+        db (Session): Database session
+        
+    Raises:
+        Exception: If there's an error manipulating the vector store
+        
+    Process:
+        1. Update document record as deleted
+        2. Load vector store
+        3. Filter out documents matching the filename
+        4. Create new vector store with remaining documents
+        5. Save updated vector store
+    """
+    if db is None:
+        db = next(get_db())
+        
+    _recuperar_vectorstore()
+    if not os.path.exists(VECTORSTORE_PATH):
+        # Log attempt to delete from non-existent vectorstore
+        user = db.query(User).filter_by(id=user_id).first()
+        registrar_accion_admin(
+            usuario=user.username,
+            accion="delete",
+            modulo="documents",
+            detalles={
+                "filename": nombre,
+                "status": "Vector store does not exist"
+            }
+        )
+        return
+        
+    try:
+        # Find and update the document record
+        nombre_decodificado = os.path.basename(nombre)
+        record = db.query(DocumentRecord).filter_by(filename=nombre_decodificado).first()
+        
+        if record:
+            # Update record as deleted
+            update_document_record(db, record, is_deleted=True, user_id=user_id)
+            
+        vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
+        
+        # Get just the filename without path
+        from urllib.parse import unquote
+        nombre_decodificado = unquote(nombre)
+        nombre_archivo = os.path.basename(nombre_decodificado)
+        
+        documentos_actualizados = []
+        for doc in vectorstore.docstore._dict.values():
+            # Verify metadata and source exist before comparing
+            if (not hasattr(doc, 'metadata') or
+                'source' not in doc.metadata or
+                doc.metadata['source'] != nombre_archivo):
+                documentos_actualizados.append(doc)
+
+        if not documentos_actualizados:
+            # If no documents remain, remove the vector store directory
+            shutil.rmtree(VECTORSTORE_PATH)
+            return
+
+        config = get_document_config(db)
+        nuevo_vectorstore = crear_vectorstore(documentos_actualizados, config.quantization)
+        guardar_vectorstore(nuevo_vectorstore)
+        
+    except Exception as e:
         raise Exception(f"Error al eliminar documento del vectorstore: {str(e)}")
\ No newline at end of file
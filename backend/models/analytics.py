@@ -1,99 +1,249 @@
-"""
-Analytics Models Module
-
-This module defines the SQLAlchemy ORM models for tracking and analyzing
-system usage, including conversations and queries. It provides:
-- Conversation tracking
-- Query history
-- User interaction analytics
-- Performance metrics
-- Feedback collection
-
-The models support comprehensive analytics and reporting features
-while maintaining relationships between users, conversations, and queries.
-"""
-
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text
-from sqlalchemy.orm import relationship
-from backend.db.database import Base
-from datetime import datetime
-
-class Conversation(Base):
-    """
-    Conversation Model
-    
-    Represents a conversation session between a user and the system.
-    Tracks the overall context of multiple related queries.
-    
-    Attributes:
-        id (int): Primary key
-        user_id (int): Foreign key to users table
-        started_at (datetime): Timestamp when conversation started
-        is_active (bool): Whether the conversation is ongoing
-        
-    Relationships:
-        user: Reference to the User model
-        queries: List of Query objects in this conversation
-        
-    Note:
-        A conversation can contain multiple queries and maintains
-        the context across these interactions.
-    """
-    __tablename__ = "conversations"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    is_active = Column(Boolean, default=True)
-
-    user = relationship("User", backref="conversations")
-    queries = relationship("Query", back_populates="conversation")
-
-class Query(Base):
-    """
-    Query Model
-    
-    Represents a single query interaction with the system.
-    Tracks the details of the query, response, and associated metrics.
-    
-    Attributes:
-        id (int): Primary key
-        user_id (int): Foreign key to users table
-        conversation_id (int): Foreign key to conversations table
-        query (Text): The user's original query
-        response (Text): System's response to the query
-        sql_generado (Text): Generated SQL query if applicable
-        feedback (str): User feedback on response quality
-            Values: 'positive', 'negative', 'neutral'
-        topic (Text): Categorized topic of the query
-        response_time (float): Time taken to generate response (seconds)
-        llm_id (int): ID of the LLM configuration used
-        timestamp (datetime): When the query was made
-        
-    Relationships:
-        user: Reference to the User model
-        conversation: Reference to the parent Conversation
-        
-    Usage:
-        This model is crucial for:
-        - Performance monitoring
-        - Quality assessment
-        - Usage patterns analysis
-        - System optimization
-    """
-    __tablename__ = "queries"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    conversation_id = Column(Integer, ForeignKey("conversations.id"))
-    query = Column(Text)
-    response = Column(Text)
-    sql_generado = Column(Text, nullable=True)
-    feedback = Column(String(50))  # positive, negative, neutral
-    topic = Column(Text)
-    response_time = Column(Float)  # in seconds
-    llm_id = Column(Integer, nullable=True)
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
-
-    user = relationship("User", backref="queries")
-    conversation = relationship("Conversation", back_populates="queries")
\ No newline at end of file
+"""
+Analytics Models Module
+
+This module defines the SQLAlchemy ORM models for tracking and analyzing
+system usage, including conversations and queries. It provides:
+- Conversation tracking
+- Query history
+- User interaction analytics
+- Performance metrics
+- Feedback collection
+
+The models support comprehensive analytics and reporting features
+while maintaining relationships between users, conversations, and queries.
+"""
+
+import enum
+import hashlib
+import zlib
+from typing import Optional
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, ForeignKey, DateTime, Text, Index, LargeBinary
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.types import TypeDecorator
+from backend.db.database import Base
+from datetime import datetime
+
+class Feedback(enum.IntEnum):
+    """
+    User feedback on a response, stored as a small integer.
+    
+    Values:
+        NEGATIVE (-1), NEUTRAL (0), POSITIVE (1)
+    """
+    NEGATIVE = -1
+    NEUTRAL = 0
+    POSITIVE = 1
+
+    @property
+    def label(self) -> str:
+        """Lowercase name used by the API ('positive', 'negative', 'neutral')."""
+        return self.name.lower()
+
+class FeedbackType(TypeDecorator):
+    """
+    SmallInteger column that reads and writes Feedback values.
+    
+    Also accepts the API labels ('positive', 'negative', 'neutral') when
+    binding, so filters like Query.feedback == "positive" keep working.
+    Reading also accepts the labels stored by older databases (see
+    backend/db/migrate.py).
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = Feedback[value.upper()]
+        return int(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # Rows from before the column was an integer hold the labels, or
+        # their numbers as text where the column type couldn't be changed
+        if isinstance(value, str):
+            value = value.strip()
+            return Feedback(int(value)) if value.lstrip("-").isdigit() else Feedback[value.upper()]
+        return Feedback(value)
+
+class Topic(Base):
+    """
+    Topic Model
+    
+    Lookup table of query topics, referenced by Query.topic_id so that
+    analytics group and filter on a small integer instead of long text.
+    
+    Attributes:
+        id (int): Primary key
+        name (str): Unique topic name
+    """
+    __tablename__ = "topics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+class ResponseBlob(Base):
+    """
+    Response Blob Model
+    
+    Content-addressed store for long texts (LLM responses, generated SQL).
+    Each distinct text is stored once, compressed, and referenced from
+    Query by its SHA-256, so repeated responses are deduplicated and the
+    queries table stays narrow for analytics scans.
+    
+    Attributes:
+        sha256 (bytes): SHA-256 of the UTF-8 text (primary key)
+        data (bytes): zlib-compressed UTF-8 text
+    """
+    __tablename__ = "response_blobs"
+
+    sha256 = Column(LargeBinary(32), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+
+    @property
+    def texto(self) -> str:
+        """Decompressed text."""
+        return zlib.decompress(self.data).decode("utf-8")
+
+    @classmethod
+    def guardar(cls, db, texto: Optional[str]) -> Optional[bytes]:
+        """
+        Store a text if it isn't stored yet and return its hash.
+        
+        Args:
+            db (Session): Database session
+            texto (str, optional): Text to store
+            
+        Returns:
+            Optional[bytes]: SHA-256 to reference from Query, None for None
+        """
+        if texto is None:
+            return None
+        contenido = texto.encode("utf-8")
+        sha256 = hashlib.sha256(contenido).digest()
+        if db.get(cls, sha256) is not None:
+            return sha256
+        valores = {"sha256": sha256, "data": zlib.compress(contenido, 6)}
+        # Another request may store the same text between the lookup and
+        # the insert; either way the existing row is kept and reused
+        if db.get_bind().dialect.name == "sqlite":
+            db.execute(sqlite_insert(cls).values(**valores).on_conflict_do_nothing())
+        else:
+            # SQL Server has no INSERT OR IGNORE; a duplicate key only
+            # rolls back this savepoint, not the caller's transaction
+            try:
+                with db.begin_nested():
+                    db.add(cls(**valores))
+            except IntegrityError:
+                pass
+        return sha256
+
+class Conversation(Base):
+    """
+    Conversation Model
+    
+    Represents a conversation session between a user and the system.
+    Tracks the overall context of multiple related queries.
+    
+    Attributes:
+        id (int): Primary key
+        user_id (int): Foreign key to users table
+        started_at (datetime): Timestamp when conversation started
+        is_active (bool): Whether the conversation is ongoing
+        
+    Relationships:
+        user: Reference to the User model
+        queries: List of Query objects in this conversation
+        
+    Note:
+        A conversation can contain multiple queries and maintains
+        the context across these interactions.
+    """
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    is_active = Column(Boolean, default=True)
+
+    user = relationship("User", backref="conversations")
+    queries = relationship("Query", back_populates="conversation")
+
+class Query(Base):
+    """
+    Query Model
+    
+    Represents a single query interaction with the system.
+    Tracks the details of the query, response, and associated metrics.
+    
+    Attributes:
+        id (int): Primary key
+        user_id (int): Foreign key to users table
+        conversation_id (int): Foreign key to conversations table
+        query (Text): The user's original query
+        response_hash (bytes): SHA-256 of the response, see ResponseBlob
+        sql_hash (bytes): SHA-256 of the generated SQL if applicable
+        response (str): System's response to the query (read-only, from the blob)
+        sql_generado (str): Generated SQL query (read-only, from the blob)
+        feedback (Feedback): User feedback on response quality
+            Values: POSITIVE (1), NEGATIVE (-1), NEUTRAL (0)
+        topic_id (int): Foreign key to topics table
+        fuente (Text): JSON with the sources used to answer (loaded on access)
+        response_time_ms (int): Time taken to generate response (milliseconds)
+        llm_id (int): ID of the LLM configuration used
+        timestamp (datetime): When the query was made
+        
+    Relationships:
+        user: Reference to the User model
+        conversation: Reference to the parent Conversation
+        topic: Reference to the Topic
+        response_blob, sql_blob: Compressed texts in ResponseBlob
+        
+    Indexes:
+        (user_id, timestamp), (conversation_id, timestamp) and
+        (topic_id, feedback) for the analytics aggregations
+        
+    Usage:
+        This model is crucial for:
+        - Performance monitoring
+        - Quality assessment
+        - Usage patterns analysis
+        - System optimization
+    """
+    __tablename__ = "queries"
+    __table_args__ = (
+        Index("ix_q_user_time", "user_id", "timestamp"),
+        Index("ix_q_conv_time", "conversation_id", "timestamp"),
+        Index("ix_q_topic_fb", "topic_id", "feedback"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    conversation_id = Column(Integer, ForeignKey("conversations.id"))
+    query = Column(Text)
+    response_hash = Column(LargeBinary(32), ForeignKey("response_blobs.sha256"), index=True)
+    sql_hash = Column(LargeBinary(32), ForeignKey("response_blobs.sha256"), nullable=True)
+    feedback = Column(FeedbackType, nullable=True)
+    topic_id = Column(Integer, ForeignKey("topics.id"), nullable=True)
+    fuente = deferred(Column(Text, nullable=True))
+    response_time_ms = Column(Integer, nullable=True)
+    llm_id = Column(Integer, nullable=True)
+    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    user = relationship("User", backref="queries")
+    conversation = relationship("Conversation", back_populates="queries")
+    topic = relationship("Topic")
+    response_blob = relationship("ResponseBlob", foreign_keys=[response_hash])
+    sql_blob = relationship("ResponseBlob", foreign_keys=[sql_hash])
+
+    @property
+    def response(self) -> Optional[str]:
+        return self.response_blob.texto if self.response_blob else None
+
+    @property
+    def sql_generado(self) -> Optional[str]:
+        return self.sql_blob.texto if self.sql_blob else None
\ No newline at end of file
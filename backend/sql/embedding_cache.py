@@ -0,0 +1,174 @@
+"""
+Embedding Cache Module
+
+This module provides a persistent cache for text embeddings. Embeddings are
+deterministic for a given model and text, so repeated lookups (the same
+question asked again, the same result rows formatted again) can be served
+without calling the embedding API.
+
+The cache has two levels:
+- An in-memory LRU for the hottest entries
+- A SQLite table shared across restarts:
+  emb_cache(hash BLOB PRIMARY KEY, model TEXT, vec BLOB)
+
+Keys are sha256(model + "\\x00" + text.strip()) and vectors are stored as
+raw float32 bytes. Rows created with a different embedding model are
+purged when the cache is opened.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+# Default number of embeddings kept in memory
+CACHE_MAXSIZE = 10000
+
+class EmbeddingCache:
+    """
+    Two-level (memory + SQLite) cache in front of an embeddings client.
+
+    Attributes:
+        embedder: LangChain embeddings object (embed_query/embed_documents)
+        model (str): Model name used to scope cache entries
+        path (str): SQLite database file
+        maxsize (int): Maximum number of in-memory entries
+
+    Example:
+        cache = EmbeddingCache(OpenAIEmbeddings(), "./vectorstore/embedding_cache.sqlite")
+        vector = cache.embed_query("¿Cuántos clientes hay?")  # API call
+        vector = cache.embed_query("¿Cuántos clientes hay?")  # cache hit
+    """
+
+    def __init__(self, embedder, path: str, maxsize: int = CACHE_MAXSIZE):
+        self.embedder = embedder
+        self.model = getattr(embedder, "model", None) or type(embedder).__name__
+        self.path = path
+        self.maxsize = maxsize
+        self._memoria: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def clave(self, texto: str) -> bytes:
+        """
+        Build the cache key for a text.
+
+        Args:
+            texto (str): Text to embed
+
+        Returns:
+            bytes: SHA-256 digest of model name and stripped text
+        """
+        return hashlib.sha256(f"{self.model}\x00{texto.strip()}".encode("utf-8")).digest()
+
+    def embed_query(self, texto: str) -> List[float]:
+        """
+        Embed a single text, using the cache when possible.
+
+        Args:
+            texto (str): Text to embed
+
+        Returns:
+            List[float]: Embedding vector
+        """
+        clave = self.clave(texto)
+        vector = self._buscar([clave]).get(clave)
+        if vector is None:
+            vector = self.embedder.embed_query(texto)
+            self._guardar({clave: vector})
+        return vector
+
+    def embed_documents(self, textos: List[str]) -> List[List[float]]:
+        """
+        Embed several texts; only cache misses are sent to the API, in one batch.
+
+        Args:
+            textos (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: One embedding per text, in input order
+        """
+        claves = [self.clave(texto) for texto in textos]
+        encontrados = self._buscar(claves)
+
+        pendientes = {}
+        for clave, texto in zip(claves, textos):
+            if clave not in encontrados:
+                pendientes.setdefault(clave, texto)
+        if pendientes:
+            vectores = self.embedder.embed_documents(list(pendientes.values()))
+            nuevos = dict(zip(pendientes.keys(), vectores))
+            self._guardar(nuevos)
+            encontrados.update(nuevos)
+
+        return [encontrados[clave] for clave in claves]
+
+    def clear(self) -> None:
+        """Remove every cached embedding, in memory and on disk."""
+        with self._lock:
+            self._memoria.clear()
+            conn = self._conexion()
+            with conn:
+                conn.execute("DELETE FROM emb_cache")
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Must be called with the lock held
+        if self._conn is None:
+            directorio = os.path.dirname(self.path)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS emb_cache (hash BLOB PRIMARY KEY, model TEXT, vec BLOB)"
+                )
+                # Embeddings from another model are not comparable with the current ones
+                self._conn.execute("DELETE FROM emb_cache WHERE model != ?", (self.model,))
+        return self._conn
+
+    def _buscar(self, claves: List[bytes]) -> dict:
+        encontrados = {}
+        with self._lock:
+            faltantes = []
+            for clave in claves:
+                if clave in self._memoria:
+                    self._memoria.move_to_end(clave)
+                    encontrados[clave] = self._memoria[clave]
+                else:
+                    faltantes.append(clave)
+            if faltantes:
+                placeholders = ",".join("?" * len(faltantes))
+                filas = self._conexion().execute(
+                    f"SELECT hash, vec FROM emb_cache WHERE hash IN ({placeholders})",
+                    faltantes
+                ).fetchall()
+                for clave, blob in filas:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    encontrados[clave] = vector
+                    self._recordar(clave, vector)
+        return encontrados
+
+    def _guardar(self, vectores: dict) -> None:
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO emb_cache (hash, model, vec) VALUES (?, ?, ?)",
+                    [
+                        (clave, self.model, np.asarray(vector, dtype=np.float32).tobytes())
+                        for clave, vector in vectores.items()
+                    ]
+                )
+            for clave, vector in vectores.items():
+                self._recordar(clave, vector)
+
+    def _recordar(self, clave: bytes, vector: List[float]) -> None:
+        # Must be called with the lock held
+        self._memoria[clave] = vector
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.maxsize:
+            self._memoria.popitem(last=False)
@@ -1,65 +1,108 @@
-from fastapi import APIRouter, Depends, Body, HTTPException
-from backend.sql.sql_connector import ejecutar_query
-from backend.auth.dependencies import require_role
-from backend.llms.llm_manager import generar_sql_desde_pregunta
-from backend.sql.rag_sql_utils import convertir_resultado_a_texto, generar_respuesta_con_contexto
-from backend.logs.logger import registrar_consulta
-from backend.sql.sql_embeddings import get_similar_records
-
-router = APIRouter(prefix="/query", tags=["Consultas"])
-
-@router.post("/preguntar")
-def preguntar_sql(
-    pregunta: str = Body(...),
-    current_user=Depends(require_role("user"))
-):
-    try:
-        # Paso 1: Buscar en embeddings primero
-        registros_similares = get_similar_records(pregunta, k=10)
-        if registros_similares:
-            # Si encontramos registros similares, usar esos como contexto
-            contexto = "Información encontrada en la base de datos:\n"
-            for registro in registros_similares:
-                contexto += f"- {registro['content']}\n"
-            
-            # Generar respuesta usando el contexto de embeddings
-            respuesta = generar_respuesta_con_contexto(pregunta, contexto)
-            
-            # Registrar consulta en logs
-            registrar_consulta(
-                usuario=current_user.username,
-                pregunta=pregunta,
-                sql="Consulta respondida usando embeddings",
-                resultado={"embeddings": registros_similares},
-                respuesta=respuesta
-            )
-            
-            return {
-                "respuesta": respuesta,
-                "sql_generado": "Consulta respondida usando embeddings"
-            }
-
-        # Si no hay resultados en embeddings, proceder con SQL
-        sql = generar_sql_desde_pregunta(pregunta)
-        resultado = ejecutar_query(sql)
-        if "error" in resultado:
-            raise HTTPException(status_code=400, detail=resultado["error"])
-
-        contexto = convertir_resultado_a_texto(resultado, incluir_similares=False)
-        respuesta = generar_respuesta_con_contexto(pregunta, contexto)
-
-        registrar_consulta(
-            usuario=current_user.username,
-            pregunta=pregunta,
-            sql=sql,
-            resultado=resultado,
-            respuesta=respuesta
-        )
-
-        return {
-            "respuesta": respuesta,
-            "sql_generado": sql
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+import asyncio
+from fastapi import APIRouter, Depends, Body, HTTPException
+from sqlalchemy.orm import Session
+from backend.db.database import get_db
+from backend.sql.sql_connector import ejecutar_query
+from backend.auth.dependencies import require_role
+from backend.llms.llm_manager import generar_sql_con_cache, invalidar_sql_cacheado
+from backend.sql.rag_sql_utils import convertir_resultado_a_texto, generar_respuesta_con_uso, unir_acotado
+from backend.logs.logger import registrar_consulta
+from backend.sql.sql_embeddings import get_similar_records, embed_query_with_cache
+from backend.sql.question_cache import QuestionCache
+
+router = APIRouter(prefix="/query", tags=["Consultas"])
+
+# Respuestas recientes, buscadas por texto exacto y por similitud de embeddings
+cache_preguntas = QuestionCache()
+
+@router.post("/preguntar")
+async def preguntar_sql(
+    pregunta: str = Body(...),
+    current_user=Depends(require_role("user")),
+    db: Session = Depends(get_db)
+):
+    try:
+        # Paso 0: Respuestas en caché (texto exacto y luego similitud semántica)
+        cacheada = cache_preguntas.get(pregunta)
+        vector_pregunta = None
+        if cacheada is None:
+            vector_pregunta = await asyncio.to_thread(embed_query_with_cache, pregunta)
+            cacheada = cache_preguntas.get_similar(vector_pregunta, pregunta)
+        if cacheada is not None:
+            await asyncio.to_thread(
+                registrar_consulta,
+                usuario=current_user.username,
+                pregunta=pregunta,
+                sql=cacheada["sql_generado"],
+                resultado={"cache": True},
+                respuesta=cacheada["respuesta"],
+                db=db
+            )
+            await asyncio.to_thread(db.commit)
+            return cacheada
+
+        # Paso 1: Buscar en embeddings (FAISS es bloqueante y se ejecuta en un hilo)
+        registros_similares = await asyncio.to_thread(get_similar_records, pregunta, 10, vector_pregunta)
+        if registros_similares:
+            # Si encontramos registros similares, usar esos como contexto
+            # (ordenados por similitud; si no caben todos se descartan los menos similares)
+            contexto, _ = unir_acotado(
+                "Información encontrada en la base de datos:",
+                (f"- {registro['content']}" for registro in registros_similares)
+            )
+            
+            # Generar respuesta usando el contexto de embeddings
+            respuesta, tokens_cache = await asyncio.to_thread(generar_respuesta_con_uso, pregunta, contexto)
+            
+            # Registrar consulta en logs
+            await asyncio.to_thread(
+                registrar_consulta,
+                usuario=current_user.username,
+                pregunta=pregunta,
+                sql="Consulta respondida usando embeddings",
+                resultado={"embeddings": registros_similares},
+                respuesta=respuesta,
+                db=db,
+                cache_read_input_tokens=tokens_cache
+            )
+            await asyncio.to_thread(db.commit)
+            
+            respuesta_final = {
+                "respuesta": respuesta,
+                "sql_generado": "Consulta respondida usando embeddings"
+            }
+            cache_preguntas.put(pregunta, respuesta_final, vector_pregunta)
+            return respuesta_final
+
+        # Si no hay resultados en embeddings, generar el SQL con el LLM
+        sql = await asyncio.to_thread(generar_sql_con_cache, pregunta)
+        resultado = await asyncio.to_thread(ejecutar_query, sql)
+        if "error" in resultado:
+            # No reutilizar un SQL que ha fallado
+            invalidar_sql_cacheado(pregunta)
+            raise HTTPException(status_code=400, detail=resultado["error"])
+
+        contexto = convertir_resultado_a_texto(resultado)
+        respuesta, tokens_cache = await asyncio.to_thread(generar_respuesta_con_uso, pregunta, contexto)
+
+        await asyncio.to_thread(
+            registrar_consulta,
+            usuario=current_user.username,
+            pregunta=pregunta,
+            sql=sql,
+            resultado=resultado,
+            respuesta=respuesta,
+            db=db,
+            cache_read_input_tokens=tokens_cache
+        )
+        await asyncio.to_thread(db.commit)
+
+        respuesta_final = {
+            "respuesta": respuesta,
+            "sql_generado": sql
+        }
+        cache_preguntas.put(pregunta, respuesta_final, vector_pregunta)
+        return respuesta_final
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
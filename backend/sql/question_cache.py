@@ -0,0 +1,202 @@
+"""
+Question Cache Module
+
+This module caches the answers produced by the SQL question pipeline so that
+repeated questions skip the embeddings lookup, SQL generation, query
+execution and LLM response generation.
+
+Two lookup tiers are provided:
+- Exact: the normalized question text (trimmed, lowercased) hashed with SHA-256
+- Semantic: cosine similarity between the question embedding and the
+  embeddings of recently answered questions, using a FAISS inner-product
+  index over L2-normalized vectors. A semantic hit is only returned when
+  both questions contain the same literals (numbers and quoted values),
+  since questions like "ventas de 2023" and "ventas de 2024" embed almost
+  identically but need different answers
+
+Entries expire after a TTL and the least recently used entry is evicted
+once the cache is full, so stale answers are bounded in time and memory.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+# Default cache settings
+CACHE_MAXSIZE = 4096
+CACHE_TTL_SECONDS = 600
+SIMILARITY_THRESHOLD = 0.95
+
+# Numbers (including dates like 2023-01-31 or 1.500,25) and quoted values
+_LITERAL_PATTERN = re.compile(r"\d+(?:[.,:/-]\d+)*|'[^']*'|\"[^\"]*\"")
+
+def clave_pregunta(pregunta: str) -> str:
+    """
+    Build the exact-match cache key for a question.
+
+    Args:
+        pregunta (str): User question
+
+    Returns:
+        str: SHA-256 hex digest of the trimmed, lowercased question
+    """
+    return hashlib.sha256(pregunta.strip().lower().encode("utf-8")).hexdigest()
+
+def literales_pregunta(pregunta: str) -> Tuple[str, ...]:
+    """
+    Extract the literals a question's answer depends on.
+
+    Args:
+        pregunta (str): User question
+
+    Returns:
+        Tuple[str, ...]: Numbers and quoted values, lowercased, in order
+    """
+    return tuple(literal.lower() for literal in _LITERAL_PATTERN.findall(pregunta))
+
+class QuestionCache:
+    """
+    Thread-safe LRU/TTL cache of question answers with a semantic tier.
+
+    Attributes:
+        maxsize (int): Maximum number of cached answers
+        ttl (float): Seconds an answer stays valid
+        threshold (float): Minimum cosine similarity for a semantic hit
+
+    Example:
+        cache = QuestionCache()
+        cache.put("¿Cuántos clientes hay?", {"respuesta": "150"}, vector)
+        cache.get("  ¿cuántos clientes hay?")  # {"respuesta": "150"}
+        cache.get_similar(otro_vector, "¿Número de clientes?")  # hit if similarity > 0.95
+    """
+
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, ttl: float = CACHE_TTL_SECONDS,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        # key -> (expiration time, cached value, vector id or None, literals)
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._claves_por_id: Dict[int, str] = {}
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._siguiente_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, pregunta: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer by exact (normalized) question text.
+
+        Args:
+            pregunta (str): User question
+
+        Returns:
+            Optional[Dict]: Cached value, or None on miss or expiry
+        """
+        with self._lock:
+            return self._obtener(clave_pregunta(pregunta))
+
+    def get_similar(self, vector: List[float], pregunta: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer for a semantically equivalent question.
+
+        Args:
+            vector (List[float]): Embedding of the question
+            pregunta (str): User question, whose literals must match the
+                cached question's
+
+        Returns:
+            Optional[Dict]: Cached value of the most similar question if its
+                cosine similarity exceeds the threshold and it has the same
+                literals, None otherwise
+        """
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            similitudes, ids = self._index.search(self._normalizar(vector), 1)
+            if ids[0][0] == -1 or similitudes[0][0] <= self.threshold:
+                return None
+            clave = self._claves_por_id.get(int(ids[0][0]))
+            if clave is None or self._entradas[clave][3] != literales_pregunta(pregunta):
+                return None
+            return self._obtener(clave)
+
+    def put(self, pregunta: str, valor: Dict[str, Any], vector: Optional[List[float]] = None) -> None:
+        """
+        Store an answer for a question.
+
+        Args:
+            pregunta (str): User question
+            valor (Dict): Value to cache (e.g. respuesta and sql_generado)
+            vector (List[float], optional): Question embedding, enables
+                semantic hits for similar questions
+        """
+        clave = clave_pregunta(pregunta)
+        with self._lock:
+            if clave in self._entradas:
+                self._eliminar(clave)
+
+            vector_id = None
+            if vector is not None:
+                matriz = self._normalizar(vector)
+                if self._index is None:
+                    self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(matriz.shape[1]))
+                vector_id = self._siguiente_id
+                self._siguiente_id += 1
+                self._index.add_with_ids(matriz, np.array([vector_id], dtype=np.int64))
+                self._claves_por_id[vector_id] = clave
+
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor, vector_id,
+                                     literales_pregunta(pregunta))
+            while len(self._entradas) > self.maxsize:
+                self._eliminar(next(iter(self._entradas)))
+
+    def remove(self, pregunta: str) -> None:
+        """
+        Remove the cached answer for a question, if any.
+        
+        Args:
+            pregunta (str): User question
+        """
+        clave = clave_pregunta(pregunta)
+        with self._lock:
+            if clave in self._entradas:
+                self._eliminar(clave)
+
+    def clear(self) -> None:
+        """Remove every cached answer."""
+        with self._lock:
+            self._entradas.clear()
+            self._claves_por_id.clear()
+            self._index = None
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _obtener(self, clave: str) -> Optional[Dict[str, Any]]:
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        expira, valor, _, _ = entrada
+        if expira < time.monotonic():
+            self._eliminar(clave)
+            return None
+        self._entradas.move_to_end(clave)
+        return valor
+
+    def _eliminar(self, clave: str) -> None:
+        _, _, vector_id, _ = self._entradas.pop(clave)
+        if vector_id is not None:
+            self._claves_por_id.pop(vector_id, None)
+            self._index.remove_ids(np.array([vector_id], dtype=np.int64))
+
+    @staticmethod
+    def _normalizar(vector: List[float]) -> np.ndarray:
+        matriz = np.asarray([vector], dtype=np.float32)
+        faiss.normalize_L2(matriz)
+        return matriz
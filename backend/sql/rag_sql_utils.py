@@ -1,124 +1,281 @@
-"""
-RAG SQL Utilities Module
-
-This module provides utilities for processing SQL query results and generating
-natural language responses using Retrieval-Augmented Generation (RAG).
-
-The module handles:
-- Converting SQL results to readable text format
-- Generating natural language responses using LLMs
-- Contextual response generation with SQL data
-
-Key components:
-- Result formatting for better readability
-- Prompt templates for response generation
-- LLM integration for natural language processing
-"""
-
-from typing import Dict
-from langchain.prompts import PromptTemplate
-from backend.llms.llm_manager import get_llm
-
-from backend.sql.sql_embeddings import get_similar_records
-
-def convertir_resultado_a_texto(resultado: Dict, incluir_similares: bool = True) -> str:
-    """
-    Convert SQL query results to a readable text format with optional similar records.
-    
-    This function takes the raw SQL query results and formats them into
-    a human-readable text string, optionally enriching it with similar records
-    from the vector store.
-    
-    Args:
-        resultado (Dict): SQL query results containing:
-            - columnas: List of column names
-            - filas: List of row dictionaries
-        incluir_similares (bool): Whether to include similar records
-            
-    Returns:
-        str: Formatted text representation of the results
-        
-    Example:
-        Input: {
-            "columnas": ["nombre", "edad"],
-            "filas": [{"nombre": "Juan", "edad": 30}]
-        }
-        Output: "Resumen de resultados obtenidos de la base de datos:
-                - nombre: Juan, edad: 30
-                
-                Registros similares encontrados:
-                - [Tabla: Empleados] nombre: Ana, edad: 31"
-    """
-    if not resultado or not resultado.get("filas"):
-        return "No se encontraron resultados."
-
-    columnas = resultado["columnas"]
-    filas = resultado["filas"]
-
-    texto = "Resumen de resultados obtenidos de la base de datos:\n"
-    for fila in filas:
-        linea = ", ".join(f"{col}: {fila[col]}" for col in columnas)
-        texto += f"- {linea}\n"
-        
-    # Add similar records if requested
-    if incluir_similares:
-        # Convert current results to search query
-        query = " ".join(str(val) for fila in filas for val in fila.values())
-        similares = get_similar_records(query, k=3)
-        
-        if similares:
-            texto += "\nRegistros similares encontrados:\n"
-            for registro in similares:
-                texto += f"- {registro['content']}\n"
-    
-    return texto.strip()
-
-# Prompt template for natural language response generation
-# This template guides the LLM in generating contextual responses
-respuesta_prompt = PromptTemplate(
-    input_variables=["contexto", "pregunta"],
-    template="""
-Usa la siguiente información recuperada de la base de datos para responder a la pregunta.
-
-Información:
-{contexto}
-
-Pregunta:
-{pregunta}
-
-Respuesta:
-"""
-)
-
-def generar_respuesta_con_contexto(pregunta: str, contexto: str, llm_id: int = None) -> str:
-    """
-    Generate a natural language response using context and an LLM.
-    
-    This function combines the provided context with the user's question
-    to generate a coherent and contextually relevant response using
-    a Language Model.
-    
-    Args:
-        pregunta (str): The user's question
-        contexto (str): Context information (e.g., SQL results)
-        llm_id (int, optional): Specific LLM configuration ID to use
-        
-    Returns:
-        str: Generated natural language response
-        
-    Process:
-        1. Get appropriate LLM instance
-        2. Apply prompt template with context and question
-        3. Generate and format response
-        
-    Example:
-        response = generar_respuesta_con_contexto(
-            "¿Cuántos empleados hay?",
-            "Resumen: - total_empleados: 150",
-            llm_id=1
-        )
-    """
-    llm = get_llm(llm_id)
-    respuesta_chain = respuesta_prompt | llm
-    respuesta = respuesta_chain.invoke({"pregunta": pregunta, "contexto": contexto})
-    return respuesta.content.strip()
+"""
+RAG SQL Utilities Module
+
+This module provides utilities for processing SQL query results and generating
+natural language responses using Retrieval-Augmented Generation (RAG).
+
+The module handles:
+- Converting SQL results to readable text format
+- Generating natural language responses using LLMs
+- Contextual response generation with SQL data
+
+Key components:
+- Result formatting for better readability
+- Prompt templates for response generation
+- LLM integration for natural language processing
+"""
+
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+from operator import itemgetter
+from langchain.prompts import PromptTemplate
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage
+from backend.llms.llm_manager import get_llm
+
+# Maximum size of the context sent to the LLM, and rows formatted per step
+MAX_CONTEXT_CHARS = 8000
+LOTE_FORMATEO = 256
+
+def formatear_filas(columnas: List[str], filas: List[Mapping]) -> List[str]:
+    """
+    Format result rows as "- col: valor, col: valor" lines.
+    
+    The line template is built once for all rows and values are pulled
+    with a single itemgetter call per row, avoiding per-cell f-strings.
+    
+    Args:
+        columnas (List[str]): Column names, in output order
+        filas (List[Mapping]): Rows indexable by column name
+        
+    Returns:
+        List[str]: One formatted line per row
+    """
+    if not columnas:
+        return ["- " for _ in filas]
+
+    plantilla = "- " + ", ".join(f"{col.replace('%', '%%')}: %s" for col in columnas)
+    obtener = itemgetter(*columnas)
+    if len(columnas) == 1:
+        return [plantilla % (obtener(fila),) for fila in filas]
+    return [plantilla % obtener(fila) for fila in filas]
+
+def formatear_columnas(columnas: List[str], valores: List[List]) -> List[str]:
+    """
+    Format column-oriented results as "- col: valor, col: valor" lines.
+    
+    Columnar counterpart of formatear_filas, used for ejecutar_query
+    results: rows are rebuilt as tuples with zip, without creating dicts.
+    
+    Args:
+        columnas (List[str]): Column names, in output order
+        valores (List[List]): One list of values per column
+        
+    Returns:
+        List[str]: One formatted line per row
+    """
+    if not columnas:
+        return []
+
+    plantilla = "- " + ", ".join(f"{col.replace('%', '%%')}: %s" for col in columnas)
+    return [plantilla % fila for fila in zip(*valores)]
+
+def unir_acotado(cabecera: str, lineas: Iterable[str], max_chars: int = MAX_CONTEXT_CHARS) -> Tuple[str, List[str]]:
+    """
+    Join a header and lines into a text of at most max_chars characters.
+    
+    Lines are consumed lazily and only until the next one would exceed
+    the budget, so a large result is never fully formatted. Lines should
+    come ordered by relevance: the tail is what gets dropped.
+    
+    Args:
+        cabecera (str): First line of the text
+        lineas (Iterable[str]): Lines to append, in order of relevance
+        max_chars (int): Maximum text length
+        
+    Returns:
+        Tuple[str, List[str]]: Joined text and the lines it includes
+    """
+    incluidas = []
+    usados = len(cabecera)
+    for linea in lineas:
+        if usados + len(linea) + 1 > max_chars:
+            if not incluidas:
+                # A single oversized line is cut rather than leaving the text empty
+                incluidas.append(linea[:max(max_chars - usados - 1, 0)])
+            break
+        usados += len(linea) + 1
+        incluidas.append(linea)
+    return "\n".join([cabecera, *incluidas]), incluidas
+
+def _num_filas(resultado: Dict) -> int:
+    """Number of rows of a result in any of the supported layouts."""
+    if "valores" in resultado:
+        return resultado.get("num_filas") or 0
+    return len(resultado.get("filas") or [])
+
+def iterar_lineas(resultado: Dict) -> Iterator[str]:
+    """
+    Yield the formatted lines of a query result, LOTE_FORMATEO rows at a time.
+    
+    Args:
+        resultado (Dict): Result with "valores" or "filas"
+        
+    Yields:
+        str: One "- col: valor, ..." line per row
+    """
+    columnas = list(resultado["columnas"])
+    total = _num_filas(resultado)
+    for inicio in range(0, total, LOTE_FORMATEO):
+        if "valores" in resultado:
+            yield from formatear_columnas(
+                columnas,
+                [columna[inicio:inicio + LOTE_FORMATEO] for columna in resultado["valores"]]
+            )
+        else:
+            yield from formatear_filas(columnas, resultado["filas"][inicio:inicio + LOTE_FORMATEO])
+
+def convertir_resultado_a_texto(resultado: Dict) -> str:
+    """
+    Convert SQL query results to a readable text format.
+    
+    This function takes the raw SQL query results and formats them into
+    a human-readable text string.
+    
+    Args:
+        resultado (Dict): SQL query results containing:
+            - columnas: List of column names
+            - valores: One list of values per column (see ejecutar_query), or
+            - filas: List of row dictionaries
+            
+    Returns:
+        str: Formatted text representation of the results, bounded to
+            about MAX_CONTEXT_CHARS; rows that don't fit are summarized
+            with a count
+        
+    Example:
+        Input: {
+            "columnas": ["nombre", "edad"],
+            "valores": [["Juan"], [30]],
+            "num_filas": 1
+        }
+        Output: "Resumen de resultados obtenidos de la base de datos:
+                - nombre: Juan, edad: 30"
+    """
+    if not resultado or "columnas" not in resultado or _num_filas(resultado) == 0:
+        return "No se encontraron resultados."
+
+    total = _num_filas(resultado)
+    texto, lineas = unir_acotado(
+        "Resumen de resultados obtenidos de la base de datos:",
+        iterar_lineas(resultado)
+    )
+    if len(lineas) < total:
+        texto += f"\n... ({total - len(lineas)} filas más no incluidas)"
+    
+    return texto.strip()
+
+# Static instructions, kept at the start of the prompt so providers can reuse
+# the cached prefix across calls (Anthropic/OpenAI prompt caching)
+RESPUESTA_PREAMBULO = "Usa la siguiente información recuperada de la base de datos para responder a la pregunta."
+
+# Prompt template for natural language response generation
+# This template guides the LLM in generating contextual responses.
+# Order matters for prompt caching: static preamble, then context, then question.
+respuesta_prompt = PromptTemplate(
+    input_variables=["contexto", "pregunta"],
+    template=RESPUESTA_PREAMBULO + """
+
+Información:
+{contexto}
+
+Pregunta:
+{pregunta}
+
+Respuesta:
+"""
+)
+
+def construir_mensaje_anthropic(pregunta: str, contexto: str) -> HumanMessage:
+    """
+    Build the response prompt as Anthropic content blocks.
+    
+    The static preamble is marked with cache_control so Anthropic caches
+    the prompt prefix; context and question follow as separate blocks.
+    
+    Args:
+        pregunta (str): The user's question
+        contexto (str): Context information (e.g., SQL results)
+        
+    Returns:
+        HumanMessage: Message with cacheable preamble block
+    """
+    return HumanMessage(content=[
+        {"type": "text", "text": RESPUESTA_PREAMBULO, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": f"Información:\n{contexto}"},
+        {"type": "text", "text": f"Pregunta:\n{pregunta}\n\nRespuesta:"}
+    ])
+
+def tokens_leidos_de_cache(respuesta) -> int:
+    """
+    Extract the number of prompt tokens served from the provider's cache.
+    
+    Args:
+        respuesta: AIMessage returned by the LLM
+        
+    Returns:
+        int: cache_read_input_tokens (Anthropic) or cached_tokens (OpenAI), 0 if unknown
+    """
+    metadata = getattr(respuesta, "response_metadata", None) or {}
+    uso = metadata.get("usage") or {}
+    if uso.get("cache_read_input_tokens") is not None:
+        return int(uso["cache_read_input_tokens"])
+    detalles = (metadata.get("token_usage") or {}).get("prompt_tokens_details") or {}
+    return int(detalles.get("cached_tokens") or 0)
+
+def generar_respuesta_con_uso(pregunta: str, contexto: str, llm_id: int = None) -> Tuple[str, int]:
+    """
+    Generate a natural language response and report prompt cache usage.
+    
+    Anthropic models receive content blocks with the preamble marked as
+    cacheable; other providers get the template, whose static prefix
+    triggers automatic prefix caching (OpenAI).
+    
+    Args:
+        pregunta (str): The user's question
+        contexto (str): Context information (e.g., SQL results)
+        llm_id (int, optional): Specific LLM configuration ID to use
+        
+    Returns:
+        Tuple[str, int]: Response text and prompt tokens read from cache
+    """
+    llm = get_llm(llm_id)
+    if isinstance(llm, ChatAnthropic):
+        respuesta = llm.invoke([construir_mensaje_anthropic(pregunta, contexto)])
+    else:
+        respuesta_chain = respuesta_prompt | llm
+        respuesta = respuesta_chain.invoke({"pregunta": pregunta, "contexto": contexto})
+    return respuesta.content.strip(), tokens_leidos_de_cache(respuesta)
+
+def generar_respuesta_con_contexto(pregunta: str, contexto: str, llm_id: int = None) -> str:
+    """
+    Generate a natural language response using context and an LLM.
+    
+    This function combines the provided context with the user's question
+    to generate a coherent and contextually relevant response using
+    a Language Model.
+    
+    Args:
+        pregunta (str): The user's question
+        contexto (str): Context information (e.g., SQL results)
+        llm_id (int, optional): Specific LLM configuration ID to use
+        
+    Returns:
+        str: Generated natural language response
+        
+    Process:
+        1. Get appropriate LLM instance
+        2. Apply prompt template with context and question
+        3. Generate and format response
+        
+    Note:
+        Use generar_respuesta_con_uso to also get prompt cache usage.
+        
+    Example:
+        response = generar_respuesta_con_contexto(
+            "¿Cuántos empleados hay?",
+            "Resumen: - total_empleados: 150",
+            llm_id=1
+        )
+    """
+    respuesta, _ = generar_respuesta_con_uso(pregunta, contexto, llm_id)
+    return respuesta
@@ -1,224 +1,469 @@
-"""
-SQL Server Connector Module
-
-This module provides functionality for connecting to and querying SQL Server databases.
-It supports both Windows Authentication and SQL Server Authentication methods,
-and handles connection configuration, query execution, and result formatting.
-
-Features:
-- Dynamic configuration loading from JSON
-- Support for Windows and SQL Server authentication
-- Secure parameter binding for queries
-- Connection pooling through SQLAlchemy
-- Error handling and result formatting
-
-Configuration:
-The module expects a sql_config.json file in the config directory with the following structure:
-{
-    "server": "server_name",
-    "database": "database_name",
-    "username": "sql_user",         // Optional for Windows auth
-    "password": "sql_password",     // Optional for Windows auth
-    "driver": "ODBC Driver 17 for SQL Server",
-    "use_windows_auth": false
-}
-"""
-
-import os
-import json
-import pyodbc
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
-from pathlib import Path
-
-def get_sql_config() -> str:
-    """
-    Load SQL Server configuration and build connection URL.
-    
-    This function reads the SQL Server configuration from a JSON file
-    and constructs the appropriate SQLAlchemy connection URL based on
-    the authentication method specified.
-    
-    Returns:
-        str: SQLAlchemy connection URL
-        
-    Raises:
-        ValueError: If configuration file is missing or invalid
-        
-    Example Config File:
-        {
-            "server": "localhost",
-            "database": "mydatabase",
-            "username": "user",
-            "password": "pass",
-            "driver": "ODBC Driver 17 for SQL Server",
-            "use_windows_auth": false
-        }
-    """
-    config_path = Path("config/sql_config.json")
-    if not config_path.exists():
-        raise ValueError("No se ha configurado la conexión a SQL Server")
-    
-    with open(config_path) as f:
-        config = json.load(f)
-    
-    # Parse server name to handle named instances
-    server = config['server']
-    if '\\' in server:
-        # For named instances, we need to specify the server in the query parameters
-        base_server = server.split('\\')[0]
-        instance = server.split('\\')[1]
-        if config.get("use_windows_auth"):
-            # Windows Authentication with named instance
-            url = f"mssql+pyodbc://{base_server}/{config['database']}?driver={config['driver'].replace(' ', '+')}&trusted_connection=yes&server={server}"
-        else:
-            # SQL Server Authentication with named instance
-            url = f"mssql+pyodbc://{config['username']}:{config['password']}@{base_server}/{config['database']}?driver={config['driver'].replace(' ', '+')}&server={server}"
-    else:
-        # For default instance
-        if config.get("use_windows_auth"):
-            # Windows Authentication
-            url = f"mssql+pyodbc://{server}/{config['database']}?driver={config['driver'].replace(' ', '+')}&trusted_connection=yes"
-        else:
-            # SQL Server Authentication
-            url = f"mssql+pyodbc://{config['username']}:{config['password']}@{server}/{config['database']}?driver={config['driver'].replace(' ', '+')}"
-    
-    return url
-
-def get_engine():
-    """
-    Create a new SQLAlchemy engine instance.
-    
-    This function creates a new database engine using the current configuration.
-    The engine manages the connection pool and provides the interface for
-    executing queries.
-    
-    Returns:
-        Engine: SQLAlchemy engine instance
-        
-    Raises:
-        ValueError: If there's an error creating the connection
-        
-    Note:
-        The engine is configured with connection pooling enabled by default,
-        which helps manage database connections efficiently.
-    """
-    try:
-        url = get_sql_config()
-        return create_engine(url)
-    except Exception as e:
-        raise ValueError(f"Error al crear la conexión SQL: {str(e)}")
-
-def test_connection() -> dict:
-    """
-    Test the SQL Server connection and generate embeddings for all tables.
-    
-    This function:
-    1. Attempts to establish a connection to the SQL Server with extended timeout
-    2. Executes a test query to verify connectivity
-    3. If successful, triggers embedding generation for all tables in batches
-    
-    Returns:
-        dict: Result containing:
-            - success: Boolean indicating if connection was successful
-            - version: SQL Server version if successful
-            - error: Error message if connection fails
-            - embeddings_status: Detailed status of embeddings generation if connection successful
-            - progress: Progress information for embedding generation
-    """
-    try:
-        # Create engine with extended timeout
-        engine = create_engine(
-            get_sql_config(),
-            connect_args={'timeout': 300}  # 5 minute timeout
-        )
-        
-        with engine.connect() as connection:
-            result = connection.execute(text("SELECT @@VERSION AS Version"))
-            version = result.scalar()
-            
-            # If connection successful, generate embeddings
-            from backend.sql.sql_embeddings import generate_database_embeddings
-            url = get_sql_config()
-            embeddings_result = generate_database_embeddings(url)
-            
-            status_message = (
-                f"Connection successful. SQL Server version: {version}\n"
-                f"Embeddings generation: {embeddings_result['message']}\n"
-                f"Progress: {embeddings_result['processed_records']}/{embeddings_result['total_records']} records"
-            )
-            
-            return {
-                "success": True,
-                "version": version,
-                "embeddings_status": embeddings_result['message'],
-                "progress": {
-                    "total": embeddings_result['total_records'],
-                    "processed": embeddings_result['processed_records']
-                },
-                "message": status_message
-            }
-    except SQLAlchemyError as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
-    except ValueError as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Error inesperado: {str(e)}"
-        }
-
-def ejecutar_query(sql: str, params: dict = None) -> dict:
-    """
-    Execute a SQL query with optional parameters.
-    
-    This function executes a SQL query safely using parameter binding
-    and returns the results in a structured format.
-    
-    Args:
-        sql (str): The SQL query to execute
-        params (dict, optional): Parameters to bind to the query
-        
-    Returns:
-        dict: Query results containing:
-            - columnas: List of column names
-            - filas: List of dictionaries containing row data
-            - error: Error message if query fails
-            
-    Example:
-        result = ejecutar_query(
-            "SELECT * FROM Users WHERE country = :country",
-            {"country": "Spain"}
-        )
-        
-    Note:
-        Uses SQLAlchemy's text() for SQL injection prevention
-        and proper parameter binding.
-    """
-    try:
-        engine = get_engine()
-        with engine.connect() as connection:
-            result = connection.execute(text(sql), params or {})
-            columnas = result.keys()
-            filas = result.fetchall()
-            return {
-                "columnas": columnas,
-                "filas": [dict(zip(columnas, fila)) for fila in filas]
-            }
-    except SQLAlchemyError as e:
-        return {"error": str(e)}
-    except ValueError as e:
-        return {"error": str(e)}
-
-
-# Example usage
-if __name__ == "__main__":
-    # Example query with parameter binding
-    query = "SELECT TOP 10 * FROM Clientes WHERE Pais = :pais"
-    print(ejecutar_query(query, {"pais": "España"}))
+"""
+SQL Server Connector Module
+
+This module provides functionality for connecting to and querying SQL Server databases.
+It supports both Windows Authentication and SQL Server Authentication methods,
+and handles connection configuration, query execution, and result formatting.
+
+Features:
+- Dynamic configuration loading from JSON
+- Support for Windows and SQL Server authentication
+- Secure parameter binding for queries
+- Connection pooling through SQLAlchemy
+- Error handling and result formatting
+
+Configuration:
+The module expects a sql_config.json file in the config directory with the following structure:
+{
+    "server": "server_name",
+    "database": "database_name",
+    "username": "sql_user",         // Optional for Windows auth
+    "password": "sql_password",     // Optional for Windows auth
+    "driver": "ODBC Driver 17 for SQL Server",
+    "use_windows_auth": false
+}
+"""
+
+import os
+import json
+import threading
+import pyodbc
+from functools import lru_cache
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import SQLAlchemyError
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+CONFIG_PATH = Path("config/sql_config.json")
+
+# Connection pool settings for the shared engine
+POOL_SIZE = 20
+MAX_OVERFLOW = 40
+POOL_RECYCLE_SECONDS = 1800
+
+# Shared engine, rebuilt only when the connection URL changes
+_engine = None
+_engine_url = None
+_engine_lock = threading.Lock()
+
+def get_sql_config() -> str:
+    """
+    Load SQL Server configuration and build connection URL.
+    
+    This function reads the SQL Server configuration from a JSON file
+    and constructs the appropriate SQLAlchemy connection URL based on
+    the authentication method specified.
+    
+    Returns:
+        str: SQLAlchemy connection URL
+        
+    Raises:
+        ValueError: If configuration file is missing or invalid
+        
+    Example Config File:
+        {
+            "server": "localhost",
+            "database": "mydatabase",
+            "username": "user",
+            "password": "pass",
+            "driver": "ODBC Driver 17 for SQL Server",
+            "use_windows_auth": false
+        }
+    """
+    if not CONFIG_PATH.exists():
+        raise ValueError("No se ha configurado la conexión a SQL Server")
+    
+    # The file is only re-read when its modification time changes
+    return _load_sql_url(CONFIG_PATH.stat().st_mtime_ns)
+
+@lru_cache(maxsize=1)
+def _load_sql_url(mtime_ns: int) -> str:
+    """
+    Read sql_config.json and build the connection URL.
+    
+    Args:
+        mtime_ns (int): Modification time of the config file, used only
+            as the cache key so edits to the file invalidate the result
+            
+    Returns:
+        str: SQLAlchemy connection URL
+    """
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    return construir_sql_url(config)
+
+def construir_sql_url(config: dict) -> str:
+    """
+    Build the SQLAlchemy connection URL for a SQL Server configuration.
+    
+    Args:
+        config (dict): Configuration with server, database,
+            driver, use_windows_auth and, for SQL authentication,
+            username and password
+            
+    Returns:
+        str: SQLAlchemy connection URL
+        
+    Note:
+        URL.create quotes credentials and query values (driver names with
+        spaces, '+', '&', passwords with '@' or ':') correctly. Named
+        instances (HOST\\INSTANCE) connect to HOST and pass the full
+        name in the server query parameter.
+    """
+    server = config['server']
+    host, _, instance = server.partition('\\')
+    windows_auth = bool(config.get("use_windows_auth"))
+    
+    query = {"driver": config['driver']}
+    if instance:
+        query["server"] = server
+    if windows_auth:
+        query["trusted_connection"] = "yes"
+    
+    url = URL.create(
+        "mssql+pyodbc",
+        username=None if windows_auth else config.get('username'),
+        password=None if windows_auth else config.get('password'),
+        host=host,
+        database=config['database'],
+        query=query
+    )
+    return url.render_as_string(hide_password=False)
+
+def get_engine():
+    """
+    Get the shared SQLAlchemy engine for the configured SQL Server.
+    
+    The engine and its connection pool are created once and reused by
+    every query. A new engine is only built (and the previous one
+    disposed) when the connection URL in sql_config.json changes.
+    
+    Returns:
+        Engine: SQLAlchemy engine instance
+        
+    Raises:
+        ValueError: If there's an error creating the connection
+        
+    Note:
+        Connections are health-checked on checkout (pool_pre_ping) and
+        recycled every 30 minutes to survive server-side timeouts.
+    """
+    global _engine, _engine_url
+    try:
+        url = get_sql_config()
+        with _engine_lock:
+            if _engine is None or url != _engine_url:
+                if _engine is not None:
+                    _engine.dispose()
+                _engine = create_engine(
+                    url,
+                    pool_size=POOL_SIZE,
+                    max_overflow=MAX_OVERFLOW,
+                    pool_pre_ping=True,
+                    pool_recycle=POOL_RECYCLE_SECONDS,
+                    fast_executemany=True
+                )
+                _engine_url = url
+            return _engine
+    except Exception as e:
+        raise ValueError(f"Error al crear la conexión SQL: {str(e)}")
+
+def reset_engine() -> None:
+    """
+    Dispose the shared engine and forget the cached configuration.
+    
+    The next call to get_engine() re-reads sql_config.json and builds a
+    fresh engine. Useful in tests and after changing the configuration.
+    """
+    global _engine, _engine_url
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _engine_url = None
+        _load_sql_url.cache_clear()
+
+def test_connection() -> dict:
+    """
+    Test the SQL Server connection and generate embeddings for all tables.
+    
+    This function:
+    1. Checks out a connection from the shared engine pool
+    2. Executes a test query to verify connectivity
+    3. If successful, triggers embedding generation for all tables in batches,
+       reusing the same engine and connection URL
+    
+    Returns:
+        dict: Result containing:
+            - success: Boolean indicating if connection was successful
+            - version: SQL Server version if successful
+            - error: Error message if connection fails
+            - embeddings_status: Detailed status of embeddings generation if connection successful
+            - progress: Progress information for embedding generation
+    """
+    try:
+        url = get_sql_config()
+        engine = get_engine()
+        
+        with engine.connect() as connection:
+            result = connection.execute(text("SELECT @@VERSION AS Version"))
+            version = result.scalar()
+            
+        # If connection successful, generate embeddings
+        from backend.sql.sql_embeddings import generate_database_embeddings
+        embeddings_result = generate_database_embeddings(url, engine=engine)
+        
+        status_message = (
+            f"Connection successful. SQL Server version: {version}\n"
+            f"Embeddings generation: {embeddings_result['message']}\n"
+            f"Progress: {embeddings_result['processed_records']}/{embeddings_result['total_records']} records"
+        )
+        
+        return {
+            "success": True,
+            "version": version,
+            "embeddings_status": embeddings_result['message'],
+            "progress": {
+                "total": embeddings_result['total_records'],
+                "processed": embeddings_result['processed_records']
+            },
+            "message": status_message
+        }
+    except SQLAlchemyError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error inesperado: {str(e)}"
+        }
+
+# Rows fetched per round trip when streaming query results
+FETCH_BATCH_SIZE = 1000
+
+# Number of distinct SQL strings whose text() construct is kept
+STATEMENT_CACHE_SIZE = 512
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _sentencia(sql: str):
+    """text() construct for a SQL string, reused across calls with the same SQL."""
+    return text(sql)
+
+def _ejecutar(connection, sql: str, params: dict = None):
+    """
+    Execute SQL on a connection, skipping SQLAlchemy's compile step when possible.
+    
+    Queries without parameters are sent as-is with exec_driver_sql. Queries
+    with parameters go through a cached text() construct, whose compiled
+    form SQLAlchemy also caches, so repeated SQL is not re-parsed.
+    
+    Args:
+        connection: SQLAlchemy connection (with execution options applied)
+        sql (str): The SQL query to execute
+        params (dict, optional): Parameters to bind to the query
+        
+    Returns:
+        CursorResult: Query result
+    """
+    if params:
+        return connection.execute(_sentencia(sql), params)
+    return connection.exec_driver_sql(sql)
+
+def ejecutar_query(sql: str, params: dict = None) -> dict:
+    """
+    Execute a SQL query with optional parameters.
+    
+    This function executes a SQL query safely using parameter binding
+    and returns the results in a structured format.
+    
+    Args:
+        sql (str): The SQL query to execute
+        params (dict, optional): Parameters to bind to the query
+        
+    Returns:
+        dict: Query results containing:
+            - columnas: List of column names
+            - valores: One list of values per column, aligned with columnas
+            - num_filas: Number of rows
+            - error: Error message if query fails
+            
+    Example:
+        result = ejecutar_query(
+            "SELECT nombre, edad FROM Users WHERE country = :country",
+            {"country": "Spain"}
+        )
+        # {"columnas": ["nombre", "edad"],
+        #  "valores": [["Juan", "Ana"], [30, 31]],
+        #  "num_filas": 2}
+        
+    Note:
+        Uses SQLAlchemy's text() for SQL injection prevention
+        and proper parameter binding; queries without parameters are sent
+        directly to the driver (see _ejecutar). Rows are fetched in batches of
+        FETCH_BATCH_SIZE and transposed into column lists (structure of
+        arrays), so no per-row dict or mapping is kept.
+    """
+    try:
+        engine = get_engine()
+        with engine.connect() as connection:
+            result = _ejecutar(
+                connection.execution_options(stream_results=True, yield_per=FETCH_BATCH_SIZE),
+                sql,
+                params
+            )
+            columnas = list(result.keys())
+            valores = [[] for _ in columnas]
+            num_filas = 0
+            for particion in result.partitions(FETCH_BATCH_SIZE):
+                num_filas += len(particion)
+                for destino, columna in zip(valores, zip(*particion)):
+                    destino.extend(columna)
+            return {
+                "columnas": columnas,
+                "valores": valores,
+                "num_filas": num_filas
+            }
+    except SQLAlchemyError as e:
+        return {"error": str(e)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+def ejecutar_queries(consultas: List[Tuple[str, Optional[dict]]], engine=None) -> List[dict]:
+    """
+    Execute several independent SELECT queries in a single round trip.
+    
+    The statements are compiled separately, joined into one batch and
+    sent with a single execute; each result set is then read with the
+    DBAPI cursor's nextset(). Useful when a caller needs several small
+    results at once (counts, samples, schema peeks).
+    
+    Args:
+        consultas (List[Tuple[str, Optional[dict]]]): (sql, params) pairs
+        engine (Engine, optional): Engine to use instead of the shared one
+        
+    Returns:
+        List[dict]: One result per query, in order, in the same format
+            as ejecutar_query (columnas, valores, num_filas). A query that
+            fails only gets {"error": ...} in its own entry.
+            
+    Example:
+        conteos = ejecutar_queries([
+            ("SELECT COUNT(*) FROM Clientes", None),
+            ("SELECT TOP 5 * FROM Pedidos WHERE Pais = :pais", {"pais": "España"})
+        ])
+        
+    Note:
+        Parameters are still bound by SQLAlchemy: each statement is
+        compiled with the engine's dialect and its positional parameters
+        are concatenated in order, so no value is ever interpolated into
+        the SQL text. Every statement must return a result set. Batching
+        relies on SQL Server's multiple result sets; on other dialects the
+        statements run one after another on a single connection. If a
+        batch fails, its queries are re-run one at a time so that one bad
+        query doesn't fail the others.
+    """
+    if not consultas:
+        return []
+    try:
+        engine = engine or get_engine()
+    except SQLAlchemyError as e:
+        return [{"error": str(e)} for _ in consultas]
+    if engine.dialect.name != "mssql":
+        return _ejecutar_una_a_una(engine, consultas)
+    try:
+        sentencias = []
+        parametros = []
+        for sql, params in consultas:
+            compilada = _sentencia(sql).compile(dialect=engine.dialect)
+            valores_bind = compilada.construct_params(params or {})
+            sentencias.append(compilada.string)
+            parametros.extend(valores_bind[nombre] for nombre in compilada.positiontup or ())
+        lote = ";\n".join(sentencias)
+        
+        with engine.connect() as connection:
+            if parametros:
+                result = connection.exec_driver_sql(lote, tuple(parametros))
+            else:
+                result = connection.exec_driver_sql(lote)
+            cursor = result.cursor
+            resultados = []
+            while True:
+                if cursor.description is not None:
+                    columnas = [columna[0] for columna in cursor.description]
+                    valores = [[] for _ in columnas]
+                    num_filas = 0
+                    while True:
+                        filas = cursor.fetchmany(FETCH_BATCH_SIZE)
+                        if not filas:
+                            break
+                        num_filas += len(filas)
+                        for destino, columna in zip(valores, zip(*filas)):
+                            destino.extend(columna)
+                    resultados.append({
+                        "columnas": columnas,
+                        "valores": valores,
+                        "num_filas": num_filas
+                    })
+                if not cursor.nextset():
+                    break
+            result.close()
+        
+        if len(resultados) != len(consultas):
+            raise ValueError(
+                f"Se esperaban {len(consultas)} conjuntos de resultados y se recibieron {len(resultados)}"
+            )
+        return resultados
+    except SQLAlchemyError:
+        return _ejecutar_una_a_una(engine, consultas)
+    except ValueError as e:
+        return [{"error": str(e)} for _ in consultas]
+
+def _ejecutar_una_a_una(engine, consultas: List[Tuple[str, Optional[dict]]]) -> List[dict]:
+    """
+    Execute queries one after another on a single connection.
+    
+    Args:
+        engine (Engine): Engine to use
+        consultas (List[Tuple[str, Optional[dict]]]): (sql, params) pairs
+        
+    Returns:
+        List[dict]: One result per query, as in ejecutar_queries; a query
+            that fails gets {"error": ...} and the rest still run
+    """
+    resultados = []
+    try:
+        with engine.connect() as connection:
+            for sql, params in consultas:
+                try:
+                    result = _ejecutar(connection, sql, params)
+                    columnas = list(result.keys())
+                    filas = result.fetchall()
+                except SQLAlchemyError as e:
+                    # Leave the connection usable for the next query
+                    connection.rollback()
+                    resultados.append({"error": str(e)})
+                    continue
+                resultados.append({
+                    "columnas": columnas,
+                    "valores": [list(columna) for columna in zip(*filas)] or [[] for _ in columnas],
+                    "num_filas": len(filas)
+                })
+    except SQLAlchemyError as e:
+        # The connection itself failed: the queries not run yet get its error
+        resultados.extend({"error": str(e)} for _ in consultas[len(resultados):])
+    return resultados
+
+
+# Example usage
+if __name__ == "__main__":
+    # Example query with parameter binding
+    query = "SELECT TOP 10 * FROM Clientes WHERE Pais = :pais"
+    print(ejecutar_query(query, {"pais": "España"}))
@@ -1,317 +1,695 @@
-"""
-SQL Embeddings Management Module
-
-This module handles the generation and management of embeddings for SQL table records.
-It provides functionality for:
-- Generating embeddings for all records in specified tables
-- Storing embeddings in FAISS vector store
-- Managing and updating embeddings when data changes
-- Integration with RAG system for query processing
-
-Key components:
-- Table record processing
-- Embedding generation
-- Vector store management
-- Record tracking
-"""
-
-import os
-from typing import List, Dict, Any
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
-from sqlalchemy import create_engine, text, MetaData, inspect
-from datetime import datetime
-from backend.sql.sql_connector import get_sql_config
-from backend.logs.logger import registrar_accion_admin
-
-# Constants
-VECTORSTORE_PATH = "./vectorstore/sql"
-embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("LLM_API_KEY"))
-
-def get_all_tables(engine) -> List[str]:
-    """
-    Get all table names from the connected database.
-    
-    Args:
-        engine: SQLAlchemy engine instance
-        
-    Returns:
-        List[str]: List of table names
-    """
-    inspector = inspect(engine)
-    return inspector.get_table_names()
-
-from typing import List, Dict, Any, Tuple
-import tiktoken
-
-def count_tokens(text: str) -> int:
-    """
-    Count the number of tokens in a text using tiktoken.
-    
-    Args:
-        text (str): Text to count tokens for
-        
-    Returns:
-        int: Number of tokens
-    """
-    encoding = tiktoken.get_encoding("cl100k_base")  # encoding used by text-embedding-ada-002
-    return len(encoding.encode(text))
-
-def format_record_text(table_name: str, record: Dict[str, Any], max_field_length: int = 1000) -> str:
-    """
-    Format a database record as text for embedding generation.
-    
-    Args:
-        table_name (str): Name of the table
-        record (Dict): Record data
-        max_field_length (int): Maximum length for each field value
-        
-    Returns:
-        str: Formatted text representation of the record
-    """
-    # Format each field with length limit
-    fields = []
-    for k, v in record.items():
-        if v is not None:
-            # Convert to string and limit length
-            v_str = str(v)
-            if len(v_str) > max_field_length:
-                v_str = v_str[:max_field_length] + "..."
-            fields.append(f"{k}: {v_str}")
-    
-    # Combine into readable text
-    return f"Table: {table_name}\n" + "\n".join(fields)
-
-def chunk_text(text: str, max_tokens: int = 250000) -> List[str]:
-    """
-    Split text into chunks that don't exceed the token limit.
-    
-    Args:
-        text (str): Text to chunk
-        max_tokens (int): Maximum tokens per chunk
-        
-    Returns:
-        List[str]: List of text chunks
-    """
-    encoding = tiktoken.get_encoding("cl100k_base")
-    tokens = encoding.encode(text)
-    
-    if len(tokens) <= max_tokens:
-        return [text]
-        
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    # Split on newlines to keep record structure
-    lines = text.split('\n')
-    header = lines[0]  # Keep the "Table: xxx" line
-    
-    for line in lines[1:]:
-        line_tokens = len(encoding.encode(line))
-        
-        if current_length + line_tokens > max_tokens:
-            # Start new chunk
-            if current_chunk:
-                chunks.append(header + '\n' + '\n'.join(current_chunk))
-            current_chunk = [line]
-            current_length = len(encoding.encode(header)) + line_tokens
-        else:
-            current_chunk.append(line)
-            current_length += line_tokens
-    
-    if current_chunk:
-        chunks.append(header + '\n' + '\n'.join(current_chunk))
-    
-    return chunks
-
-def process_table(engine, table_name: str) -> List[Document]:
-    """
-    Process all records in a table and convert them to documents.
-    
-    Args:
-        engine: SQLAlchemy engine instance
-        table_name (str): Name of the table to process
-        
-    Returns:
-        List[Document]: List of documents ready for embedding
-    """
-    documents = []
-    
-    with engine.connect() as conn:
-        # Get all records from the table
-        result = conn.execute(text(f"SELECT * FROM {table_name}"))
-        columns = result.keys()
-        
-        for row in result:
-            record = dict(zip(columns, row))
-            text_content = format_record_text(table_name, record)
-            
-            # Create document with metadata
-            doc = Document(
-                page_content=text_content,
-                metadata={
-                    "table": table_name,
-                    "record_id": str(record.get("id", "unknown")),
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            )
-            documents.append(doc)
-            
-    return documents
-
-def generate_database_embeddings(connection_url: str, batch_size: int = 1000) -> dict:
-    """
-    Generate embeddings for all records in all tables.
-    
-    Args:
-        connection_url (str): Database connection URL
-        batch_size (int): Number of records to process in each batch
-        
-    Returns:
-        dict: Status information including progress and completion details
-        
-    Process:
-        1. Connect to database
-        2. Get all tables
-        3. Process each table's records in batches
-        4. Generate embeddings
-        5. Store in FAISS index
-    """
-    try:
-        engine = create_engine(connection_url, pool_timeout=300)  # 5 minute timeout
-        tables = get_all_tables(engine)
-        
-        total_records = 0
-        processed_records = 0
-        all_documents = []
-        
-        # First count total records
-        for table in tables:
-            try:
-                with engine.connect() as conn:
-                    result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                    count = result.scalar()
-                    total_records += count
-            except Exception as e:
-                print(f"Error counting records in table {table}: {str(e)}")
-                continue
-        
-        # Process tables in batches
-        for table in tables:
-            try:
-                with engine.connect() as conn:
-                    # Get total records for this table
-                    offset = 0
-                    while True:
-                        # Process batch
-                        query = text(f"SELECT * FROM {table} ORDER BY (SELECT NULL) OFFSET {offset} ROWS FETCH NEXT {batch_size} ROWS ONLY")
-                        result = conn.execute(query)
-                        
-                        if not result:
-                            break
-                            
-                        batch_records = []
-                        columns = result.keys()
-                        for row in result:
-                            record = dict(zip(columns, row))
-                            text_content = format_record_text(table, record, max_field_length=1000)
-                            
-                            # Split into chunks if needed
-                            chunks = chunk_text(text_content, max_tokens=200000)  # Reduced from 250k to be safe
-                            for i, chunk in enumerate(chunks):
-                                doc = Document(
-                                    page_content=chunk,
-                                    metadata={
-                                        "table": table,
-                                        "record_id": str(record.get("id", "unknown")),
-                                        "chunk": i + 1 if len(chunks) > 1 else None,
-                                        "total_chunks": len(chunks),
-                                        "timestamp": datetime.utcnow().isoformat()
-                                    }
-                                )
-                                batch_records.append(doc)
-                            processed_records += 1
-                        
-                        if not batch_records:
-                            break
-                            
-                        # Process in smaller chunks to avoid token limits
-                        chunk_size = 50  # Process 50 documents at a time
-                        for i in range(0, len(batch_records), chunk_size):
-                            chunk_docs = batch_records[i:i + chunk_size]
-                            try:
-                                if os.path.exists(VECTORSTORE_PATH):
-                                    vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
-                                    vectorstore.add_documents(chunk_docs)
-                                else:
-                                    vectorstore = FAISS.from_documents(chunk_docs, embeddings)
-                                vectorstore.save_local(VECTORSTORE_PATH)
-                                all_documents.extend(chunk_docs)
-                            except Exception as e:
-                                print(f"Error processing chunk in table {table}: {str(e)}")
-                                continue
-                        
-                        offset += batch_size
-                        
-                        # Return progress
-                        progress = (processed_records / total_records) * 100 if total_records > 0 else 0
-                        print(f"Progress: {progress:.2f}% ({processed_records}/{total_records} records)")
-                        
-            except Exception as e:
-                print(f"Error processing table {table}: {str(e)}")
-                continue
-        
-        if not all_documents:
-            return {
-                "status": "warning",
-                "message": "No records found to process.",
-                "total_records": 0,
-                "processed_records": 0
-            }
-            
-        return {
-            "status": "success",
-            "message": f"Successfully generated embeddings for {processed_records} records from {len(tables)} tables.",
-            "total_records": total_records,
-            "processed_records": processed_records
-        }
-        
-    except Exception as e:
-        error_msg = f"Error generating database embeddings: {str(e)}"
-        print(error_msg)
-        return {
-            "status": "error",
-            "message": error_msg,
-            "total_records": total_records if 'total_records' in locals() else 0,
-            "processed_records": processed_records if 'processed_records' in locals() else 0
-        }
-
-def get_similar_records(query: str, k: int = 5) -> List[Dict[str, Any]]:
-    """
-    Retrieve similar records based on a query.
-    
-    Args:
-        query (str): Search query
-        k (int): Number of records to retrieve
-        
-    Returns:
-        List[Dict]: List of similar records with metadata
-    """
-    if not os.path.exists(VECTORSTORE_PATH):
-        return []
-        
-    vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
-    docs = vectorstore.similarity_search(query, k=k)
-    
-    results = []
-    for doc in docs:
-        results.append({
-            "content": doc.page_content,
-            "table": doc.metadata.get("table"),
-            "record_id": doc.metadata.get("record_id"),
-            "timestamp": doc.metadata.get("timestamp")
-        })
-        
-    return results
\ No newline at end of file
+"""
+SQL Embeddings Management Module
+
+This module handles the generation and management of embeddings for SQL table records.
+It provides functionality for:
+- Generating embeddings for all records in specified tables
+- Storing embeddings in FAISS vector store
+- Managing and updating embeddings when data changes
+- Integration with RAG system for query processing
+
+Key components:
+- Table record processing
+- Embedding generation
+- Vector store management
+- Record tracking
+"""
+
+import os
+import asyncio
+import logging
+import numpy as np
+import faiss
+import tiktoken
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from langchain_openai import OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain.docstore.document import Document
+from sqlalchemy import create_engine, text, MetaData, inspect, select, literal_column, column, bindparam
+from sqlalchemy import table as sql_table
+from datetime import datetime, timezone
+from backend.sql.sql_connector import get_sql_config, ejecutar_queries
+from backend.logs.logger import registrar_accion_admin
+from backend.sql.embedding_cache import EmbeddingCache
+from backend.core.vectorstore_io import guardar_atomico, recuperar
+from backend.core.embedding_retry import aembed_con_reintentos
+
+logger = logging.getLogger("backend.sql")
+
+# Constants
+VECTORSTORE_PATH = "./vectorstore/sql"
+EMBEDDING_CACHE_PATH = "./vectorstore/embedding_cache.sqlite"
+
+# Per-field character cap and per-document token limit for record texts
+# (below the model's context, reduced from 250k to be safe)
+MAX_FIELD_LENGTH = 1000
+MAX_RECORD_TOKENS = 200000
+
+# Limits per embedding request (inputs and total tokens; the API accepts up
+# to 2048 inputs and ~300k tokens) and maximum requests in flight
+EMBEDDING_BATCH_SIZE = 1000
+EMBEDDING_BATCH_MAX_TOKENS = 250000
+EMBEDDING_CONCURRENCY = 8
+
+# Tables read at the same time (each holds its own database connection)
+TABLE_CONCURRENCY = 4
+
+# Switch the index from exact (flat) to approximate HNSW search above this
+# many vectors; M links per node, efSearch candidates explored per query
+ANN_MIN_VECTORS = 50000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("LLM_API_KEY"))
+embedding_cache = EmbeddingCache(embeddings, EMBEDDING_CACHE_PATH)
+
+def embed_query_with_cache(text: str) -> List[float]:
+    """
+    Embed a search query, reusing previously computed embeddings.
+    
+    Args:
+        text (str): Query text
+        
+    Returns:
+        List[float]: Embedding vector
+    """
+    return embedding_cache.embed_query(text)
+
+def get_all_tables(engine) -> List[str]:
+    """
+    Get all table names from the connected database.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+        
+    Returns:
+        List[str]: List of table names
+    """
+    inspector = inspect(engine)
+    return inspector.get_table_names()
+
+def get_primary_keys(engine, tables: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Get the primary key columns of the tables in the connected database.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+        tables (List[str], optional): Tables to inspect (default: all)
+        
+    Returns:
+        Dict[str, List[str]]: Primary key column names per table name
+        
+    Note:
+        Uses the inspector's multi-table reflection, a single call for the
+        whole schema on dialects that support it.
+    """
+    inspector = inspect(engine)
+    claves = inspector.get_multi_pk_constraint(filter_names=tables)
+    return {nombre: pk.get("constrained_columns") or [] for (_, nombre), pk in claves.items()}
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """
+    Get the tokenizer used by the embedding model.
+    
+    Loading an encoding parses its BPE merge table, so it is done once
+    and reused by every count_tokens/chunk_text call.
+    
+    Returns:
+        tiktoken.Encoding: cl100k_base encoding (text-embedding-ada-002)
+    """
+    return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    """
+    Count the number of tokens in a text using tiktoken.
+    
+    Args:
+        text (str): Text to count tokens for
+        
+    Returns:
+        int: Number of tokens
+    """
+    return len(get_encoding().encode(text))
+
+def format_record_text(table_name: str, columns: List[str], row, max_field_length: int = 1000) -> str:
+    """
+    Format a database record as text for embedding generation.
+    
+    Args:
+        table_name (str): Name of the table
+        columns (List[str]): Column names
+        row (Sequence): Record values, aligned with columns (e.g. a Row)
+        max_field_length (int): Maximum length for each field value
+        
+    Returns:
+        str: Formatted text representation of the record
+    """
+    # Combine into readable text, one field per line with length limit
+    return f"Table: {table_name}\n" + "\n".join(
+        f"{k}: {_texto_de_campo(v, max_field_length)}"
+        for k, v in zip(columns, row)
+        if v is not None
+    )
+
+def _record_id(row, id_idx: Optional[int]) -> str:
+    """Record id stored in the metadata ("unknown" when the table has no id column)."""
+    return str(row[id_idx]) if id_idx is not None else "unknown"
+
+def _texto_de_campo(value: Any, max_field_length: int) -> str:
+    """
+    Convert a field value to text of at most max_field_length characters.
+    
+    Binary values are cut before decoding, so large BLOB columns are
+    never converted to text in full.
+    """
+    if isinstance(value, str):
+        v_str = value
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        v_str = bytes(value[:max_field_length + 1]).decode("utf-8", "replace")
+    else:
+        v_str = str(value)
+    if len(v_str) > max_field_length:
+        v_str = v_str[:max_field_length] + "..."
+    return v_str
+
+def chunk_text(text: str, max_tokens: int = 250000) -> List[str]:
+    """
+    Split text into chunks that don't exceed the token limit.
+    
+    Args:
+        text (str): Text to chunk
+        max_tokens (int): Maximum tokens per chunk
+        
+    Returns:
+        List[str]: List of text chunks
+    """
+    # Byte-level BPE never yields more tokens than UTF-8 bytes (at most 4
+    # per character), so short texts need no tokenization at all
+    if len(text) * 4 <= max_tokens:
+        return [text]
+    
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    
+    if len(tokens) <= max_tokens:
+        return [text]
+        
+    chunks = []
+    current_chunk = []
+    current_length = 0
+    
+    # Split on newlines to keep record structure
+    lines = text.split('\n')
+    header = lines[0]  # Keep the "Table: xxx" line
+    header_tokens = len(encoding.encode(header))
+    
+    # Token counts for all lines in one call into the tokenizer
+    line_token_counts = [len(ids) for ids in encoding.encode_ordinary_batch(lines[1:])]
+    
+    for line, line_tokens in zip(lines[1:], line_token_counts):
+        if current_length + line_tokens > max_tokens:
+            # Start new chunk
+            if current_chunk:
+                chunks.append(header + '\n' + '\n'.join(current_chunk))
+            current_chunk = [line]
+            current_length = header_tokens + line_tokens
+        else:
+            current_chunk.append(line)
+            current_length += line_tokens
+    
+    if current_chunk:
+        chunks.append(header + '\n' + '\n'.join(current_chunk))
+    
+    return chunks
+
+def _paginas_de_tabla(engine, table: str, batch_size: int, pk_columns: Optional[List[str]] = None):
+    """
+    Read a table and yield its rows in pages of at most batch_size.
+    
+    Tables with a single-column primary key are paged on it (keyset
+    pagination: each page is an index seek). Other tables are read with a
+    single streamed SELECT, fetched batch_size rows at a time through a
+    server-side cursor, instead of re-scanning with OFFSET/FETCH.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+        table (str): Name of the table
+        batch_size (int): Number of records read per round trip
+        pk_columns (List[str], optional): Primary key columns, when already
+            known (see get_primary_keys); inspected otherwise
+        
+    Yields:
+        Tuple[List[str], List[Row]]: Column names and the next page of rows
+    """
+    if pk_columns is None:
+        pk_columns = inspect(engine).get_pk_constraint(table).get("constrained_columns") or []
+    pk = pk_columns[0] if len(pk_columns) == 1 else None
+    
+    # Statements are built once per table as SQLAlchemy constructs: names
+    # are quoted by the dialect, the keyset boundary and page size are bound
+    # parameters, and every page after the first reuses the same compiled SQL
+    tabla = sql_table(table)
+    todas = select(literal_column("*")).select_from(tabla)
+    
+    with engine.connect() as conn:
+        if pk is None:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(todas)
+            columns = list(result.keys())
+            for page in result.partitions(batch_size):
+                yield columns, page
+            return
+        
+        clave = column(pk)
+        primera_pagina = todas.order_by(clave).limit(batch_size)
+        siguiente_pagina = primera_pagina.where(clave > bindparam("last"))
+        last = None
+        while True:
+            if last is None:
+                result = conn.execute(primera_pagina)
+            else:
+                result = conn.execute(siguiente_pagina, {"last": last})
+            columns = list(result.keys())
+            page = result.fetchall()
+            if not page:
+                break
+            yield columns, page
+            last = page[-1][columns.index(pk)]
+
+def _documentos_de_tabla(engine, table: str, batch_size: int, pk_columns: Optional[List[str]] = None) -> Tuple[List[str], List[Dict[str, Any]], int]:
+    """
+    Read a table in batches and convert its records to texts to embed.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+        table (str): Name of the table
+        batch_size (int): Number of records read per round trip
+        pk_columns (List[str], optional): Primary key columns of the table
+        
+    Returns:
+        Tuple[List[str], List[Dict[str, Any]], int]: Texts, their metadata
+            (parallel lists) and number of records read
+            
+    Note:
+        Texts and metadata are kept as parallel lists rather than Document
+        objects, since they go straight to add_embeddings.
+    """
+    texts = []
+    metadatas = []
+    records = 0
+    for columns, page in _paginas_de_tabla(engine, table, batch_size, pk_columns):
+        timestamp = datetime.now(timezone.utc).isoformat()
+        id_idx = columns.index("id") if "id" in columns else None
+        
+        # Longest text a record can produce: header plus one "name: value..."
+        # line per column with values capped at MAX_FIELD_LENGTH. When even
+        # that cannot reach the token limit (at most 4 tokens per character),
+        # no record of the table needs chunk_text
+        max_chars = len(f"Table: {table}") + sum(len(str(c)) + MAX_FIELD_LENGTH + 6 for c in columns)
+        puede_superar_limite = max_chars * 4 > MAX_RECORD_TOKENS
+        
+        for row in page:
+            text_content = format_record_text(table, columns, row, max_field_length=MAX_FIELD_LENGTH)
+            record_id = _record_id(row, id_idx)
+            
+            # Split into chunks if needed
+            chunks = chunk_text(text_content, max_tokens=MAX_RECORD_TOKENS) if puede_superar_limite else [text_content]
+            total_chunks = len(chunks)
+            for i, chunk in enumerate(chunks):
+                texts.append(chunk)
+                metadatas.append({
+                    "table": table,
+                    "record_id": record_id,
+                    "chunk": i + 1 if total_chunks > 1 else None,
+                    "total_chunks": total_chunks,
+                    "timestamp": timestamp
+                })
+            records += 1
+    return texts, metadatas, records
+
+def _contar_registros(engine, tables: List[str]) -> int:
+    """
+    Estimate the total number of records in the given tables.
+    
+    On SQL Server the row counts come from sys.dm_db_partition_stats
+    metadata, which avoids a full scan per table. For other dialects, or
+    if the metadata view is not accessible, it falls back to one batch of
+    COUNT(*) queries.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+        tables (List[str]): Tables to count
+        
+    Returns:
+        int: Total number of records (tables that fail are counted as 0)
+    """
+    if engine.dialect.name == "mssql":
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text(
+                    "SELECT OBJECT_NAME(object_id), SUM(row_count) "
+                    "FROM sys.dm_db_partition_stats "
+                    "WHERE index_id IN (0, 1) AND OBJECTPROPERTY(object_id, 'IsUserTable') = 1 "
+                    "AND OBJECT_SCHEMA_NAME(object_id) = SCHEMA_NAME() "
+                    "GROUP BY object_id"
+                ))
+                conteos = {nombre: filas for nombre, filas in result}
+            return sum(int(conteos.get(table) or 0) for table in tables)
+        except Exception:
+            logger.exception("Error reading row counts from metadata; counting with COUNT(*)")
+    
+    total_records = 0
+    quote = engine.dialect.identifier_preparer.quote
+    conteos = ejecutar_queries([(f"SELECT COUNT(*) FROM {quote(table)}", None) for table in tables], engine=engine)
+    for table, conteo in zip(tables, conteos):
+        if "error" in conteo:
+            logger.warning("Error counting records in table %s: %s", table, conteo["error"])
+            continue
+        total_records += conteo["valores"][0][0]
+    return total_records
+
+def _lotes_de_embedding(textos: List[str]) -> List[Tuple[int, int]]:
+    """
+    Split texts into embedding requests as large as the API allows.
+    
+    Consecutive texts are packed into one request until adding the next
+    one would exceed EMBEDDING_BATCH_SIZE inputs or
+    EMBEDDING_BATCH_MAX_TOKENS tokens.
+    
+    Args:
+        textos (List[str]): Texts to embed
+        
+    Returns:
+        List[Tuple[int, int]]: (start, end) slice bounds of each request
+        
+    Note:
+        Tokens are first bounded by len(text) * 4 (as in chunk_text), and
+        texts are only tokenized when that bound would push a request over
+        the token limit, so requests of short texts skip tiktoken entirely.
+    """
+    if not textos:
+        return []
+    tokens = [len(texto) * 4 for texto in textos]
+    exactos = [False] * len(textos)
+    
+    lotes = []
+    inicio = 0
+    tokens_lote = 0
+    for i in range(len(textos)):
+        if i > inicio and i - inicio >= EMBEDDING_BATCH_SIZE:
+            lotes.append((inicio, i))
+            inicio = i
+            tokens_lote = 0
+        if tokens_lote + tokens[i] > EMBEDDING_BATCH_MAX_TOKENS:
+            # Near the limit: replace the bounds of this request by exact counts
+            pendientes = [j for j in range(inicio, i + 1) if not exactos[j]]
+            contados = get_encoding().encode_ordinary_batch([textos[j] for j in pendientes])
+            for j, ids in zip(pendientes, contados):
+                tokens[j] = len(ids)
+                exactos[j] = True
+            tokens_lote = sum(tokens[inicio:i])
+            if i > inicio and tokens_lote + tokens[i] > EMBEDDING_BATCH_MAX_TOKENS:
+                lotes.append((inicio, i))
+                inicio = i
+                tokens_lote = 0
+        tokens_lote += tokens[i]
+    lotes.append((inicio, len(textos)))
+    return lotes
+
+async def _embed_tablas(engine, tables: List[str], batch_size: int,
+                        guardar_tabla: Callable[[str, List[str], List[Dict[str, Any]], np.ndarray], None],
+                        primary_keys: Optional[Dict[str, List[str]]] = None) -> List[Tuple[str, int, int]]:
+    """
+    Read and embed all tables concurrently (submit all, then wait).
+    
+    Each table is read in a worker thread, with at most TABLE_CONCURRENCY
+    tables (and database connections) being read at once; as soon as its
+    texts are ready their embedding batches are sent to the API. At most
+    EMBEDDING_CONCURRENCY embedding requests are in flight at once, shared
+    by all tables. Rate-limited requests are retried as described in
+    backend.core.embedding_retry.
+    
+    Vectors are kept as float32 arrays, and each table is handed to
+    guardar_tabla as soon as it is embedded, so only the tables in
+    progress are held in memory.
+    
+    Args:
+        engine: SQLAlchemy engine instance
+        tables (List[str]): Tables to process
+        batch_size (int): Number of records read per round trip
+        guardar_tabla (Callable): Called in a worker thread, one table at a
+            time, with the table name, its embedded texts, their metadata
+            and their vectors (float32 array, one row per text)
+        primary_keys (Dict[str, List[str]], optional): Primary key columns
+            per table (see get_primary_keys)
+        
+    Returns:
+        List[Tuple]: Per table: name, number of documents embedded and
+            number of records read. Failed tables or batches are skipped.
+    """
+    semaforo = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+    semaforo_tablas = asyncio.Semaphore(TABLE_CONCURRENCY)
+    lock_guardado = asyncio.Lock()
+
+    async def embed_lote(table: str, inicio: int, lote: List[str]):
+        async with semaforo:
+            try:
+                vectores = await aembed_con_reintentos(embeddings, lote)
+                return inicio, np.asarray(vectores, dtype=np.float32)
+            except Exception as e:
+                print(f"Error processing chunk in table {table}: {str(e)}")
+                return inicio, None
+
+    async def embed_tabla(table: str):
+        try:
+            async with semaforo_tablas:
+                texts, metadatas, records = await asyncio.to_thread(
+                    _documentos_de_tabla, engine, table, batch_size,
+                    primary_keys.get(table) if primary_keys is not None else None
+                )
+        except Exception as e:
+            print(f"Error processing table {table}: {str(e)}")
+            return table, 0, 0
+
+        # Identical records produce identical texts: embed each distinct
+        # text once (texts include the table name, so duplicates can only
+        # occur within a table) and reuse its vector for every copy
+        unicos = list(dict.fromkeys(texts))
+        resultados = await asyncio.gather(*(
+            embed_lote(table, inicio, unicos[inicio:fin])
+            for inicio, fin in _lotes_de_embedding(unicos)
+        ))
+        vector_de = {}
+        for inicio, lote_vectores in resultados:
+            if lote_vectores is not None:
+                vector_de.update(zip(unicos[inicio:inicio + len(lote_vectores)], lote_vectores))
+        
+        textos_ok, metadatas_ok, vectores = [], [], []
+        for texto, metadata in zip(texts, metadatas):
+            vector = vector_de.get(texto)
+            if vector is None:
+                continue
+            textos_ok.append(texto)
+            metadatas_ok.append(metadata)
+            vectores.append(vector)
+        del texts, metadatas, resultados, vector_de
+        print(f"Table {table}: {records} records, {len(textos_ok)} documents embedded ({len(unicos)} distinct)")
+        
+        if textos_ok:
+            async with lock_guardado:
+                await asyncio.to_thread(guardar_tabla, table, textos_ok, metadatas_ok, np.stack(vectores))
+        return table, len(textos_ok), records
+
+    return await asyncio.gather(*(embed_tabla(table) for table in tables))
+
+def _usar_indice_hnsw(vectorstore: FAISS) -> bool:
+    """
+    Replace a large flat index with an HNSW index holding the same vectors.
+    
+    A flat index compares the query with every stored vector; once it
+    holds ANN_MIN_VECTORS or more, it is rebuilt as an approximate HNSW
+    graph (same L2 metric and vector ids), which keeps search latency low
+    at the cost of a small recall loss. Smaller indexes, and indexes that
+    are already HNSW, are left unchanged.
+    
+    Args:
+        vectorstore (FAISS): Vector store whose index may be replaced
+        
+    Returns:
+        bool: Whether the index was replaced
+    """
+    index = vectorstore.index
+    if not isinstance(index, faiss.IndexFlat) or index.ntotal < ANN_MIN_VECTORS:
+        return False
+    hnsw = faiss.IndexHNSWFlat(index.d, HNSW_M, index.metric_type)
+    hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+    hnsw.add(index.reconstruct_n(0, index.ntotal))
+    vectorstore.index = hnsw
+    return True
+
+def _guardar_vectorstore(vectorstore: FAISS) -> None:
+    """
+    Save the vector store to VECTORSTORE_PATH without ever leaving a half-written index.
+    
+    Args:
+        vectorstore (FAISS): Vector store to save
+        
+    Note:
+        See backend.core.vectorstore_io: index.faiss and index.pkl are
+        swapped in together, and a crash mid-swap is repaired by the next
+        generate_database_embeddings run.
+    """
+    guardar_atomico(VECTORSTORE_PATH, vectorstore.save_local)
+
+def generate_database_embeddings(connection_url: str, batch_size: int = 1000, engine=None) -> dict:
+    """
+    Generate embeddings for all records in all tables.
+    
+    Args:
+        connection_url (str): Database connection URL
+        batch_size (int): Number of records to process in each batch
+        engine (Engine, optional): Existing engine to reuse (e.g. the shared
+            pooled engine). When omitted a temporary engine is created from
+            connection_url and disposed at the end.
+        
+    Returns:
+        dict: Status information including progress and completion details
+        
+    Process:
+        1. Connect to database
+        2. Get all tables
+        3. Read every table and embed its records concurrently
+        4. Add each embedded table to the FAISS index and save it, so
+           finished tables survive a crash later in the run
+        5. Switch the index to HNSW once it is large (see _usar_indice_hnsw)
+        
+    Note:
+        Runs its own event loop, so it must be called from synchronous code.
+    """
+    owns_engine = engine is None
+    if owns_engine:
+        engine = create_engine(connection_url, pool_timeout=300)  # 5 minute timeout
+    try:
+        tables = get_all_tables(engine)
+        
+        total_records = _contar_registros(engine, tables)
+        
+        # Load the existing index up front: a broken index fails before
+        # any embedding requests are paid for
+        recuperar(VECTORSTORE_PATH, ("index.faiss", "index.pkl"))
+        vectorstore = None
+        if os.path.exists(VECTORSTORE_PATH):
+            vectorstore = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
+        
+        def guardar_tabla(table, texts, metadatas, vectores):
+            # Add each finished table to the index and save a checkpoint, so
+            # a crash only loses the tables still being embedded
+            nonlocal vectorstore
+            text_embeddings = list(zip(texts, vectores))
+            if vectorstore is not None:
+                vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
+            else:
+                vectorstore = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas)
+            _guardar_vectorstore(vectorstore)
+        
+        # Read and embed all tables concurrently
+        resultados = asyncio.run(_embed_tablas(
+            engine, tables, batch_size, guardar_tabla, get_primary_keys(engine, tables)
+        ))
+        
+        processed_records = sum(records for _, _, records in resultados)
+        if not any(documentos for _, documentos, _ in resultados):
+            return {
+                "status": "warning",
+                "message": "No records found to process.",
+                "total_records": 0,
+                "processed_records": 0
+            }
+        
+        if _usar_indice_hnsw(vectorstore):
+            _guardar_vectorstore(vectorstore)
+            
+        return {
+            "status": "success",
+            "message": f"Successfully generated embeddings for {processed_records} records from {len(tables)} tables.",
+            "total_records": total_records,
+            "processed_records": processed_records
+        }
+        
+    except Exception as e:
+        error_msg = f"Error generating database embeddings: {str(e)}"
+        print(error_msg)
+        return {
+            "status": "error",
+            "message": error_msg,
+            "total_records": total_records if 'total_records' in locals() else 0,
+            "processed_records": processed_records if 'processed_records' in locals() else 0
+        }
+    finally:
+        if owns_engine:
+            engine.dispose()
+
+def get_vectorstore() -> Optional[FAISS]:
+    """
+    Get the SQL records vector store, loading it from disk only when needed.
+    
+    Returns:
+        Optional[FAISS]: Loaded vector store, or None if none has been generated
+        
+    Note:
+        The loaded index is cached and reused by every search until
+        index.faiss is rewritten (its modification time changes).
+    """
+    index_path = os.path.join(VECTORSTORE_PATH, "index.faiss")
+    if not os.path.exists(index_path):
+        return None
+    return _load_vectorstore(os.stat(index_path).st_mtime_ns)
+
+@lru_cache(maxsize=1)
+def _load_vectorstore(mtime_ns: int) -> FAISS:
+    """
+    Load the vector store from disk.
+    
+    Args:
+        mtime_ns (int): Modification time of index.faiss, used only as the
+            cache key so a regenerated index invalidates the result
+            
+    Returns:
+        FAISS: Loaded vector store
+    """
+    return FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
+
+def get_similar_records(query: str, k: int = 5, embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieve similar records based on a query.
+    
+    Args:
+        query (str): Search query
+        k (int): Number of records to retrieve
+        embedding (List[float], optional): Precomputed embedding of the query.
+            When omitted, the query is embedded through the embedding cache.
+        
+    Returns:
+        List[Dict]: List of similar records with metadata
+    """
+    vectorstore = get_vectorstore()
+    if vectorstore is None:
+        return []
+        
+    if embedding is None:
+        embedding = embed_query_with_cache(query)
+    docs = vectorstore.similarity_search_by_vector(embedding, k=k)
+    
+    return [_document_to_record(doc) for doc in docs]
+
+def _document_to_record(doc: Document) -> Dict[str, Any]:
+    """Convert a stored document into the record dict returned by searches."""
+    return {
+        "content": doc.page_content,
+        "table": doc.metadata.get("table"),
+        "record_id": doc.metadata.get("record_id"),
+        "timestamp": doc.metadata.get("timestamp")
+    }
\ No newline at end of file
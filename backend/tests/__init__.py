@@ -1,3 +1,3 @@
-"""
-Test package initialization.
+"""
+Test package initialization.
 """
\ No newline at end of file
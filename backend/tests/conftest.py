@@ -1,150 +1,204 @@
-"""
-Pytest configuration and shared fixtures.
-"""
-
-import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from backend.db.database import Base
-
-# Test database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-
-@pytest.fixture(scope="session")
-def engine():
-    """Create a SQLAlchemy engine for testing."""
-    return create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-
-@pytest.fixture(scope="session")
-def TestingSessionLocal(engine):
-    """Create a TestingSessionLocal factory."""
-    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-@pytest.fixture(scope="function")
-def db_session(engine, TestingSessionLocal):
-    """
-    Create a fresh database session for each test.
-    
-    This fixture will create all tables before each test and drop them after,
-    ensuring a clean state for each test.
-    """
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-
-@pytest.fixture
-def test_user(db_session):
-    """Create a test user fixture."""
-    from backend.auth.models import User
-    user = User(
-        username="testuser",
-        full_name="Test User",
-        role="user",
-        is_active=True
-    )
-    user.set_password("testpass123")
-    db_session.add(user)
-    db_session.commit()
-    return user
-
-@pytest.fixture
-def test_admin_user(db_session):
-    """Create a test admin user fixture."""
-    from backend.auth.models import User
-    admin = User(
-        username="admin",
-        full_name="Admin User",
-        role="superuser",
-        is_active=True
-    )
-    admin.set_password("adminpass123")
-    db_session.add(admin)
-    db_session.commit()
-    return admin
-
-@pytest.fixture
-def test_llm_config(db_session):
-    """Create a test LLM configuration fixture."""
-    from backend.auth.models import LLMConfig
-    config = LLMConfig(
-        name="test-gpt4",
-        provider="openai",
-        model_name="gpt-4",
-        api_key="sk-test123",
-        temperature="0.7",
-        is_active=True,
-        is_default=True
-    )
-    db_session.add(config)
-    db_session.commit()
-    return config
-
-@pytest.fixture
-def test_document_config(db_session):
-    """Create a test document configuration fixture."""
-    from backend.auth.models import DocumentConfig
-    config = DocumentConfig(
-        max_file_size=10,
-        allowed_extensions=".pdf,.doc,.docx,.txt",
-        max_files_per_upload=5,
-        storage_path="test/uploads/",
-        is_active=True
-    )
-    db_session.add(config)
-    db_session.commit()
-    return config
-
-@pytest.fixture
-def test_sql_config(db_session):
-    """Create a test SQL configuration fixture."""
-    from backend.auth.models import SQLConfig
-    config = SQLConfig(
-        server="test-server",
-        database="test-db",
-        username="test-user",
-        password="test-pass",
-        driver="ODBC Driver 17 for SQL Server",
-        use_windows_auth=False,
-        is_active=True
-    )
-    db_session.add(config)
-    db_session.commit()
-    return config
-
-@pytest.fixture
-def test_document_record(db_session, test_user):
-    """Create a test document record fixture."""
-    from backend.auth.models import DocumentRecord
-    doc = DocumentRecord(
-        filename="test.pdf",
-        file_path="/test/uploads/test.pdf",
-        file_size=1024,
-        file_type="pdf",
-        uploaded_by=test_user.id,
-        is_indexed=False,
-        is_deleted=False
-    )
-    db_session.add(doc)
-    db_session.commit()
-    return doc
-
-@pytest.fixture
-def test_document_log(db_session, test_user, test_document_record):
-    """Create a test document log fixture."""
-    from backend.auth.models import DocumentLog
-    log = DocumentLog(
-        document_id=test_document_record.id,
-        user_id=test_user.id,
-        action="upload",
-        details="Test upload"
-    )
-    db_session.add(log)
-    db_session.commit()
+"""
+Pytest configuration and shared fixtures.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.db.database import Base
+from backend.auth import password_utils
+
+# Test database URL (in memory, shared by all sessions through StaticPool)
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+
+# bcrypt work factor used by the tests (production uses password_utils.BCRYPT_ROUNDS)
+TEST_BCRYPT_ROUNDS = 4
+
+# Work factor used in production, kept for the tests that check it
+PRODUCTION_BCRYPT_ROUNDS = password_utils.BCRYPT_ROUNDS
+
+def pytest_configure(config):
+    """Register the custom markers used by the suite."""
+    config.addinivalue_line("markers", "slow: test uses production-cost operations")
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """
+    Hash passwords with the minimum bcrypt cost during tests.
+    
+    Hashes are still real bcrypt hashes ($2b$), so hashing and
+    verification tests keep their meaning, and existing hashes with a
+    higher cost still verify; only the key stretching work is reduced.
+    """
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(password_utils, "BCRYPT_ROUNDS", TEST_BCRYPT_ROUNDS)
+        yield
+
+@pytest.fixture
+def production_bcrypt(monkeypatch):
+    """Hash passwords with the production bcrypt cost within a test."""
+    monkeypatch.setattr(password_utils, "BCRYPT_ROUNDS", PRODUCTION_BCRYPT_ROUNDS)
+
+@pytest.fixture(scope="session")
+def engine():
+    """Create a SQLAlchemy engine for testing with the schema created once."""
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+
+    # Let SQLAlchemy emit BEGIN itself: the sqlite3 driver's own transaction
+    # handling breaks the SAVEPOINTs db_session relies on for isolation
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="session")
+def TestingSessionLocal(engine):
+    """Create a TestingSessionLocal factory."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session(engine):
+    """
+    Create a fresh database session for each test.
+    
+    The session runs inside a transaction that is rolled back after the
+    test, so each test starts from an empty schema without recreating the
+    tables. Commits made by the test (or by the code under test) only
+    release a SAVEPOINT inside that transaction.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = sessionmaker(
+        bind=connection,
+        autocommit=False,
+        autoflush=False,
+        join_transaction_mode="create_savepoint"
+    )()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+@pytest.fixture
+def test_user(db_session):
+    """Create a test user fixture."""
+    from backend.auth.models import User
+    user = User(
+        username="testuser",
+        full_name="Test User",
+        role="user",
+        is_active=True
+    )
+    user.set_password("testpass123")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+@pytest.fixture
+def test_admin_user(db_session):
+    """Create a test admin user fixture."""
+    from backend.auth.models import User
+    admin = User(
+        username="admin",
+        full_name="Admin User",
+        role="superuser",
+        is_active=True
+    )
+    admin.set_password("adminpass123")
+    db_session.add(admin)
+    db_session.commit()
+    return admin
+
+@pytest.fixture
+def test_llm_config(db_session):
+    """Create a test LLM configuration fixture."""
+    from backend.auth.models import LLMConfig
+    config = LLMConfig(
+        name="test-gpt4",
+        provider="openai",
+        model_name="gpt-4",
+        api_key="sk-test123",
+        temperature="0.7",
+        is_active=True,
+        is_default=True
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+@pytest.fixture
+def test_document_config(db_session):
+    """Create a test document configuration fixture."""
+    from backend.auth.models import DocumentConfig
+    config = DocumentConfig(
+        max_file_size=10,
+        allowed_extensions=".pdf,.doc,.docx,.txt",
+        max_files_per_upload=5,
+        storage_path="test/uploads/",
+        is_active=True
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+@pytest.fixture
+def test_sql_config(db_session):
+    """Create a test SQL configuration fixture."""
+    from backend.auth.models import SQLConfig
+    config = SQLConfig(
+        server="test-server",
+        database="test-db",
+        username="test-user",
+        password="test-pass",
+        driver="ODBC Driver 17 for SQL Server",
+        use_windows_auth=False,
+        is_active=True
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+@pytest.fixture
+def test_document_record(db_session, test_user):
+    """Create a test document record fixture."""
+    from backend.auth.models import DocumentRecord
+    doc = DocumentRecord(
+        filename="test.pdf",
+        file_path="/test/uploads/test.pdf",
+        file_size=1024,
+        file_type="pdf",
+        uploaded_by=test_user.id,
+        is_indexed=False,
+        is_deleted=False
+    )
+    db_session.add(doc)
+    db_session.commit()
+    return doc
+
+@pytest.fixture
+def test_document_log(db_session, test_user, test_document_record):
+    """Create a test document log fixture."""
+    from backend.auth.models import DocumentLog
+    log = DocumentLog(
+        document_id=test_document_record.id,
+        user_id=test_user.id,
+        action="upload",
+        details="Test upload"
+    )
+    db_session.add(log)
+    db_session.commit()
     return log
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Unit tests for the embedding cache module.
+"""
+
+import pytest
+from backend.sql.embedding_cache import EmbeddingCache
+
+class FakeEmbedder:
+    """Embeddings client stub that counts how many texts it embeds."""
+
+    def __init__(self, model="fake-model"):
+        self.model = model
+        self.llamadas = 0
+
+    def embed_query(self, texto):
+        self.llamadas += 1
+        return [float(len(texto)), 1.0, 0.5]
+
+    def embed_documents(self, textos):
+        self.llamadas += len(textos)
+        return [[float(len(texto)), 1.0, 0.5] for texto in textos]
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Path for a throwaway SQLite cache file."""
+    return str(tmp_path / "embedding_cache.sqlite")
+
+def test_repeated_query_hits_cache(cache_path):
+    """Test that a query is embedded once, ignoring outer whitespace."""
+    embedder = FakeEmbedder()
+    cache = EmbeddingCache(embedder, cache_path)
+
+    primero = cache.embed_query("clientes de Madrid")
+    segundo = cache.embed_query("  clientes de Madrid ")
+
+    assert primero == segundo
+    assert embedder.llamadas == 1
+
+def test_cache_persists_across_instances(cache_path):
+    """Test that embeddings are reloaded from SQLite after a restart."""
+    EmbeddingCache(FakeEmbedder(), cache_path).embed_query("ventas 2024")
+
+    embedder = FakeEmbedder()
+    vector = EmbeddingCache(embedder, cache_path).embed_query("ventas 2024")
+
+    assert vector == [11.0, 1.0, 0.5]
+    assert embedder.llamadas == 0
+
+def test_batch_embeds_only_misses(cache_path):
+    """Test that embed_documents only sends uncached, unique texts."""
+    embedder = FakeEmbedder()
+    cache = EmbeddingCache(embedder, cache_path)
+    cache.embed_query("a")
+
+    vectores = cache.embed_documents(["a", "bb", "bb", "ccc"])
+
+    assert [v[0] for v in vectores] == [1.0, 2.0, 2.0, 3.0]
+    assert embedder.llamadas == 3
+
+def test_model_change_invalidates_entries(cache_path):
+    """Test that entries from another embedding model are not reused."""
+    EmbeddingCache(FakeEmbedder("modelo-a"), cache_path).embed_query("productos")
+
+    embedder = FakeEmbedder("modelo-b")
+    EmbeddingCache(embedder, cache_path).embed_query("productos")
+
+    assert embedder.llamadas == 1
@@ -0,0 +1,58 @@
+"""
+Unit tests for the shared embedding retry helper.
+"""
+
+import asyncio
+import httpx
+import pytest
+from openai import RateLimitError
+
+from backend.core import embedding_retry
+from backend.core.embedding_retry import aembed_con_reintentos, EMBEDDING_MAX_RETRIES
+
+def _rate_limit() -> RateLimitError:
+    respuesta = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"))
+    return RateLimitError("Rate limit reached", response=respuesta, body=None)
+
+class EmbeddingsLimitados:
+    """Embedding model that is rate-limited for its first `fallos` requests."""
+
+    def __init__(self, fallos: int):
+        self.fallos = fallos
+        self.llamadas = 0
+
+    async def aembed_documents(self, textos):
+        self.llamadas += 1
+        if self.llamadas <= self.fallos:
+            raise _rate_limit()
+        return [[float(len(texto))] for texto in textos]
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Record backoff delays instead of sleeping."""
+    registradas = []
+
+    async def dormir(segundos):
+        registradas.append(segundos)
+
+    monkeypatch.setattr(embedding_retry.asyncio, "sleep", dormir)
+    return registradas
+
+def test_retries_until_success(esperas):
+    """Test that rate-limited requests are retried with growing, jittered delays."""
+    modelo = EmbeddingsLimitados(fallos=2)
+
+    assert asyncio.run(aembed_con_reintentos(modelo, ["ab", "c"])) == [[2.0], [1.0]]
+    assert modelo.llamadas == 3
+    base = embedding_retry.EMBEDDING_RETRY_BASE_SECONDS
+    assert base <= esperas[0] <= 2 * base
+    assert 2 * base <= esperas[1] <= 4 * base
+
+def test_gives_up_after_max_retries(esperas):
+    """Test that the rate limit error is raised once the retries are exhausted."""
+    modelo = EmbeddingsLimitados(fallos=EMBEDDING_MAX_RETRIES + 1)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(aembed_con_reintentos(modelo, ["a"]))
+    assert modelo.llamadas == EMBEDDING_MAX_RETRIES + 1
+    assert len(esperas) == EMBEDDING_MAX_RETRIES
@@ -0,0 +1,71 @@
+"""
+Unit tests for the logging system module.
+"""
+
+import pytest
+from backend.logs.logger import (
+    RegistroAdmin,
+    RegistroConsulta,
+    FeedbackRespuesta,
+    registrar_accion_admin,
+    registrar_consulta,
+    registrar_feedback
+)
+
+def test_registrar_accion_admin_reuses_session(db_session):
+    """Test that an admin action is stored through the caller's session."""
+    registrar_accion_admin(
+        usuario="admin",
+        accion="create",
+        modulo="users",
+        detalles={"username": "nuevo"},
+        db=db_session
+    )
+
+    log = db_session.query(RegistroAdmin).first()
+    assert log.usuario == "admin"
+    assert log.detalles == {"username": "nuevo"}
+    # The caller's session must remain usable after logging
+    assert db_session.is_active
+
+def test_registrar_feedback_reuses_session(db_session):
+    """Test that feedback is stored through the caller's session."""
+    registrar_feedback("testuser", "¿Cuántos clientes hay?", True, db=db_session)
+
+    feedback = db_session.query(FeedbackRespuesta).first()
+    assert feedback.usuario == "testuser"
+    assert feedback.fue_util is True
+
+def test_registrar_consulta_stores_cache_tokens(db_session):
+    """Test that prompt cache usage is stored with the query log."""
+    registrar_consulta(
+        usuario="testuser",
+        pregunta="¿Cuántos clientes hay?",
+        sql="SELECT COUNT(*) FROM Clientes",
+        resultado={"filas": []},
+        respuesta="Hay 150 clientes",
+        db=db_session,
+        cache_read_input_tokens=1024
+    )
+
+    log = db_session.query(RegistroConsulta).first()
+    assert log.cache_read_input_tokens == 1024
+
+def test_registrar_accion_admin_leaves_commit_to_caller(db_session):
+    """Test that logging with the caller's session doesn't commit its pending changes."""
+    db_session.add(RegistroAdmin(usuario="admin", accion="update", modulo="llm", detalles={}))
+    registrar_accion_admin("admin", "create", "users", {"username": "nuevo"}, db=db_session)
+
+    db_session.rollback()
+
+    assert db_session.query(RegistroAdmin).count() == 0
+
+def test_failed_log_keeps_caller_changes(db_session):
+    """Test that a failing log insert is rolled back alone, keeping the caller's work."""
+    db_session.add(RegistroAdmin(usuario="admin", accion="update", modulo="llm", detalles={}))
+
+    with pytest.raises(Exception):
+        registrar_accion_admin("admin", "create", "users", {"objeto": object()}, db=db_session)
+
+    db_session.commit()
+    assert [log.accion for log in db_session.query(RegistroAdmin)] == ["update"]
@@ -0,0 +1,120 @@
+"""
+Unit tests for the database migration script.
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from backend.db.migrate import migrar
+from backend.models.analytics import Query, Topic, Feedback, ResponseBlob
+
+# Queries table as it was before feedback and topic became small keys
+QUERIES_ANTIGUA = """
+CREATE TABLE queries (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER,
+    conversation_id INTEGER,
+    query TEXT,
+    response TEXT,
+    sql_generado TEXT,
+    feedback VARCHAR(50),
+    topic TEXT,
+    response_time FLOAT,
+    llm_id INTEGER,
+    timestamp DATETIME NOT NULL
+)
+"""
+
+# Query log table as it was before cache_read_input_tokens
+LOGS_CONSULTAS_ANTIGUA = """
+CREATE TABLE logs_consultas (
+    id INTEGER PRIMARY KEY,
+    usuario VARCHAR(100),
+    pregunta TEXT,
+    respuesta TEXT
+)
+"""
+
+@pytest.fixture
+def engine_antiguo():
+    """In-memory SQLite database with the old queries table and some rows."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as conn:
+        conn.execute(text(QUERIES_ANTIGUA))
+        conn.execute(text(LOGS_CONSULTAS_ANTIGUA))
+        conn.execute(text(
+            "INSERT INTO queries (id, query, response, sql_generado, feedback, topic, response_time, timestamp) VALUES "
+            "(1, 'ventas', 'Hubo 3', 'SELECT 3', 'positive', '{\"tipo\": \"sql\"}', 1.5, '2024-01-01 00:00:00'), "
+            "(2, 'error', 'Error', NULL, 'negative', '{\"error\": {\"tipo\": \"X\"}}', 0.25, '2024-01-01 00:00:00'), "
+            "(3, 'doc', 'Segun el manual', NULL, NULL, '{\"tipo\": \"documentos\"}', NULL, '2024-01-01 00:00:00'), "
+            "(4, 'ventas', 'Hubo 3', 'SELECT 3', NULL, '{\"tipo\": \"sql\"}', 0.5, '2024-01-01 00:00:00')"
+        ))
+    yield engine
+    engine.dispose()
+
+def _filas(engine):
+    c = Query.__table__.c
+    consulta = (
+        select(c.id, c.feedback, Topic.name, c.fuente, c.response_time_ms)
+        .outerjoin(Topic, Topic.id == c.topic_id)
+        .order_by(c.id)
+    )
+    with engine.connect() as conn:
+        return conn.execute(consulta).all()
+
+def test_migrar_converts_old_queries(engine_antiguo):
+    """Test that old feedback labels, topics and times are converted in place."""
+    migrar(engine_antiguo)
+
+    filas = _filas(engine_antiguo)
+    assert [f.feedback for f in filas] == [Feedback.POSITIVE, Feedback.NEGATIVE, None, None]
+    assert [f.name for f in filas] == ["sql", "error", "documentos", "sql"]
+    assert [f.response_time_ms for f in filas] == [1500, 250, None, 500]
+    assert filas[0].fuente == '{"tipo": "sql"}'
+
+def test_migrar_moves_texts_to_blobs(engine_antiguo):
+    """Test that old responses and SQL are readable through the blobs and stored once."""
+    migrar(engine_antiguo)
+
+    with Session(engine_antiguo) as db:
+        consultas = db.query(Query).order_by(Query.id).all()
+        assert [q.response for q in consultas] == ["Hubo 3", "Error", "Segun el manual", "Hubo 3"]
+        assert [q.sql_generado for q in consultas] == ["SELECT 3", None, None, "SELECT 3"]
+        assert db.query(ResponseBlob).count() == 4
+
+def test_migrar_adds_log_columns(engine_antiguo):
+    """Test that columns added to the query log are created on the existing table."""
+    migrar(engine_antiguo)
+
+    columnas = {c["name"] for c in inspect(engine_antiguo).get_columns("logs_consultas")}
+    assert "cache_read_input_tokens" in columnas
+
+def test_migrar_creates_indexes(engine_antiguo):
+    """Test that the analytics indexes are created on the existing table."""
+    migrar(engine_antiguo)
+
+    indices = {i["name"] for i in inspect(engine_antiguo).get_indexes("queries")}
+    assert {"ix_q_user_time", "ix_q_conv_time", "ix_q_topic_fb", "ix_queries_response_hash"} <= indices
+
+def test_migrar_is_idempotent(engine_antiguo):
+    """Test that running the migration twice leaves the data unchanged."""
+    migrar(engine_antiguo)
+    primera = _filas(engine_antiguo)
+    migrar(engine_antiguo)
+
+    assert _filas(engine_antiguo) == primera
+
+def test_feedback_reads_old_labels(engine_antiguo):
+    """Test that feedback stored as labels is read as Feedback before migrating."""
+    with engine_antiguo.connect() as conn:
+        feedback = conn.execute(
+            select(Query.__table__.c.feedback).where(Query.__table__.c.id == 2)
+        ).scalar()
+
+    assert feedback is Feedback.NEGATIVE
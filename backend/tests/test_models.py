@@ -1,251 +1,292 @@
-"""
-Unit tests for database models.
-"""
-
-import pytest
-from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import IntegrityError
-
-from backend.db.database import Base
-from backend.auth.models import (
-    User,
-    LLMConfig,
-    DocumentConfig,
-    SQLConfig,
-    DocumentRecord,
-    DocumentLog
-)
-
-# Test database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-@pytest.fixture(scope="function")
-def db_session():
-    """Create a clean database session for each test."""
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-
-# User Model Tests
-def test_create_user(db_session):
-    """Test creating a new user with all fields."""
-    user = User(
-        username="testuser",
-        full_name="Test User",
-        role="user",
-        is_active=True
-    )
-    user.set_password("testpass123")
-    
-    db_session.add(user)
-    db_session.commit()
-    
-    saved_user = db_session.query(User).first()
-    assert saved_user.username == "testuser"
-    assert saved_user.full_name == "Test User"
-    assert saved_user.role == "user"
-    assert saved_user.is_active is True
-    assert saved_user.hashed_password.startswith("$2b$")
-
-def test_user_unique_username(db_session):
-    """Test that usernames must be unique."""
-    user1 = User(username="testuser", full_name="Test User 1")
-    user1.set_password("pass123")
-    db_session.add(user1)
-    db_session.commit()
-    
-    user2 = User(username="testuser", full_name="Test User 2")
-    user2.set_password("pass456")
-    db_session.add(user2)
-    
-    with pytest.raises(IntegrityError):
-        db_session.commit()
-    db_session.rollback()
-
-def test_user_password_hashing(db_session):
-    """Test that passwords are properly hashed."""
-    user = User(username="testuser", full_name="Test User")
-    plain_password = "mypassword123"
-    user.set_password(plain_password)
-    
-    assert user.hashed_password != plain_password
-    assert user.hashed_password.startswith("$2b$")
-
-def test_user_default_values(db_session):
-    """Test default values for user fields."""
-    user = User(username="testuser")
-    user.set_password("pass123")
-    db_session.add(user)
-    db_session.commit()
-    
-    assert user.is_active is True
-    assert user.full_name is None
-
-# LLMConfig Model Tests
-def test_create_llm_config(db_session):
-    """Test creating a new LLM configuration."""
-    config = LLMConfig(
-        name="test-gpt4",
-        provider="openai",
-        model_name="gpt-4",
-        api_key="sk-test123",
-        temperature="0.7"
-    )
-    
-    db_session.add(config)
-    db_session.commit()
-    
-    saved_config = db_session.query(LLMConfig).first()
-    assert saved_config.name == "test-gpt4"
-    assert saved_config.provider == "openai"
-    assert saved_config.model_name == "gpt-4"
-    assert saved_config.api_key == "sk-test123"
-    assert saved_config.temperature == "0.7"
-    assert saved_config.is_active is True
-    assert saved_config.is_default is False
-
-# DocumentConfig Model Tests
-def test_create_document_config(db_session):
-    """Test creating a new document configuration."""
-    config = DocumentConfig(
-        max_file_size=20,
-        allowed_extensions=".pdf,.docx",
-        max_files_per_upload=10,
-        storage_path="custom/uploads/"
-    )
-    
-    db_session.add(config)
-    db_session.commit()
-    
-    saved_config = db_session.query(DocumentConfig).first()
-    assert saved_config.max_file_size == 20
-    assert saved_config.allowed_extensions == ".pdf,.docx"
-    assert saved_config.max_files_per_upload == 10
-    assert saved_config.storage_path == "custom/uploads/"
-    assert saved_config.is_active is True
-    assert isinstance(saved_config.created_at, datetime)
-    assert isinstance(saved_config.updated_at, datetime)
-
-def test_document_config_defaults(db_session):
-    """Test default values for document configuration."""
-    config = DocumentConfig()
-    db_session.add(config)
-    db_session.commit()
-    
-    assert config.max_file_size == 10
-    assert config.allowed_extensions == ".pdf,.doc,.docx,.txt"
-    assert config.max_files_per_upload == 5
-    assert config.storage_path == "uploads/"
-    assert config.is_active is True
-
-# SQLConfig Model Tests
-def test_create_sql_config(db_session):
-    """Test creating a new SQL server configuration."""
-    config = SQLConfig(
-        server="test-server",
-        database="test-db",
-        username="test-user",
-        password="test-pass",
-        driver="ODBC Driver 18 for SQL Server",
-        use_windows_auth=False
-    )
-    
-    db_session.add(config)
-    db_session.commit()
-    
-    saved_config = db_session.query(SQLConfig).first()
-    assert saved_config.server == "test-server"
-    assert saved_config.database == "test-db"
-    assert saved_config.username == "test-user"
-    assert saved_config.password == "test-pass"
-    assert saved_config.driver == "ODBC Driver 18 for SQL Server"
-    assert saved_config.use_windows_auth is False
-    assert saved_config.is_active is True
-
-def test_sql_config_windows_auth(db_session):
-    """Test SQL configuration with Windows authentication."""
-    config = SQLConfig(
-        server="test-server",
-        database="test-db",
-        use_windows_auth=True
-    )
-    
-    db_session.add(config)
-    db_session.commit()
-    
-    saved_config = db_session.query(SQLConfig).first()
-    assert saved_config.username is None
-    assert saved_config.password is None
-    assert saved_config.use_windows_auth is True
-
-# DocumentRecord and DocumentLog Tests
-def test_document_record_with_user(db_session):
-    """Test creating a document record with user relationship."""
-    # Create a user first
-    user = User(username="testuser", full_name="Test User")
-    user.set_password("pass123")
-    db_session.add(user)
-    db_session.commit()
-    
-    # Create a document record
-    doc = DocumentRecord(
-        filename="test.pdf",
-        file_path="/uploads/test.pdf",
-        file_size=1024,
-        file_type="pdf",
-        uploaded_by=user.id
-    )
-    
-    db_session.add(doc)
-    db_session.commit()
-    
-    # Test the relationship
-    assert doc.user.username == "testuser"
-    assert doc.is_indexed is False
-    assert doc.is_deleted is False
-    assert isinstance(doc.upload_date, datetime)
-    assert isinstance(doc.last_modified, datetime)
-
-def test_document_log_relationships(db_session):
-    """Test document log relationships with user and document."""
-    # Create user and document
-    user = User(username="testuser", full_name="Test User")
-    user.set_password("pass123")
-    db_session.add(user)
-    db_session.commit()
-    
-    doc = DocumentRecord(
-        filename="test.pdf",
-        file_path="/uploads/test.pdf",
-        file_size=1024,
-        file_type="pdf",
-        uploaded_by=user.id
-    )
-    db_session.add(doc)
-    db_session.commit()
-    
-    # Create log entry
-    log = DocumentLog(
-        document_id=doc.id,
-        user_id=user.id,
-        action="upload",
-        details="Initial upload"
-    )
-    
-    db_session.add(log)
-    db_session.commit()
-    
-    # Test relationships
-    assert log.user.username == "testuser"
-    assert log.document.filename == "test.pdf"
-    assert isinstance(log.timestamp, datetime)
-    assert log.action == "upload"
-    assert log.details == "Initial upload"
\ No newline at end of file
+"""
+Unit tests for database models.
+"""
+
+import pytest
+from unittest.mock import patch
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+
+from backend.auth.models import (
+    User,
+    LLMConfig,
+    DocumentConfig,
+    SQLConfig,
+    DocumentRecord,
+    DocumentLog
+)
+from backend.models.analytics import Query, Topic, Feedback, ResponseBlob
+
+# User Model Tests
+def test_create_user(db_session):
+    """Test creating a new user with all fields."""
+    user = User(
+        username="testuser",
+        full_name="Test User",
+        role="user",
+        is_active=True
+    )
+    user.set_password("testpass123")
+    
+    db_session.add(user)
+    db_session.commit()
+    
+    saved_user = db_session.query(User).first()
+    assert saved_user.username == "testuser"
+    assert saved_user.full_name == "Test User"
+    assert saved_user.role == "user"
+    assert saved_user.is_active is True
+    assert saved_user.hashed_password.startswith("$2b$")
+
+def test_user_unique_username(db_session):
+    """Test that usernames must be unique."""
+    user1 = User(username="testuser", full_name="Test User 1")
+    user1.set_password("pass123")
+    db_session.add(user1)
+    db_session.commit()
+    
+    user2 = User(username="testuser", full_name="Test User 2")
+    user2.set_password("pass456")
+    db_session.add(user2)
+    
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+    db_session.rollback()
+
+def test_user_password_hashing(db_session):
+    """Test that passwords are properly hashed."""
+    user = User(username="testuser", full_name="Test User")
+    plain_password = "mypassword123"
+    user.set_password(plain_password)
+    
+    assert user.hashed_password != plain_password
+    assert user.hashed_password.startswith("$2b$")
+
+def test_user_default_values(db_session):
+    """Test default values for user fields."""
+    user = User(username="testuser")
+    user.set_password("pass123")
+    db_session.add(user)
+    db_session.commit()
+    
+    assert user.is_active is True
+    assert user.full_name is None
+
+# LLMConfig Model Tests
+def test_create_llm_config(db_session):
+    """Test creating a new LLM configuration."""
+    config = LLMConfig(
+        name="test-gpt4",
+        provider="openai",
+        model_name="gpt-4",
+        api_key="sk-test123",
+        temperature="0.7"
+    )
+    
+    db_session.add(config)
+    db_session.commit()
+    
+    saved_config = db_session.query(LLMConfig).first()
+    assert saved_config.name == "test-gpt4"
+    assert saved_config.provider == "openai"
+    assert saved_config.model_name == "gpt-4"
+    assert saved_config.api_key == "sk-test123"
+    assert saved_config.temperature == "0.7"
+    assert saved_config.is_active is True
+    assert saved_config.is_default is False
+
+# DocumentConfig Model Tests
+def test_create_document_config(db_session):
+    """Test creating a new document configuration."""
+    config = DocumentConfig(
+        max_file_size=20,
+        allowed_extensions=".pdf,.docx",
+        max_files_per_upload=10,
+        storage_path="custom/uploads/"
+    )
+    
+    db_session.add(config)
+    db_session.commit()
+    
+    saved_config = db_session.query(DocumentConfig).first()
+    assert saved_config.max_file_size == 20
+    assert saved_config.allowed_extensions == ".pdf,.docx"
+    assert saved_config.max_files_per_upload == 10
+    assert saved_config.storage_path == "custom/uploads/"
+    assert saved_config.is_active is True
+    assert isinstance(saved_config.created_at, datetime)
+    assert isinstance(saved_config.updated_at, datetime)
+
+def test_document_config_defaults(db_session):
+    """Test default values for document configuration."""
+    config = DocumentConfig()
+    db_session.add(config)
+    db_session.commit()
+    
+    assert config.max_file_size == 10
+    assert config.allowed_extensions == ".pdf,.doc,.docx,.txt"
+    assert config.max_files_per_upload == 5
+    assert config.storage_path == "uploads/"
+    assert config.is_active is True
+
+# SQLConfig Model Tests
+def test_create_sql_config(db_session):
+    """Test creating a new SQL server configuration."""
+    config = SQLConfig(
+        server="test-server",
+        database="test-db",
+        username="test-user",
+        password="test-pass",
+        driver="ODBC Driver 18 for SQL Server",
+        use_windows_auth=False
+    )
+    
+    db_session.add(config)
+    db_session.commit()
+    
+    saved_config = db_session.query(SQLConfig).first()
+    assert saved_config.server == "test-server"
+    assert saved_config.database == "test-db"
+    assert saved_config.username == "test-user"
+    assert saved_config.password == "test-pass"
+    assert saved_config.driver == "ODBC Driver 18 for SQL Server"
+    assert saved_config.use_windows_auth is False
+    assert saved_config.is_active is True
+
+def test_sql_config_windows_auth(db_session):
+    """Test SQL configuration with Windows authentication."""
+    config = SQLConfig(
+        server="test-server",
+        database="test-db",
+        use_windows_auth=True
+    )
+    
+    db_session.add(config)
+    db_session.commit()
+    
+    saved_config = db_session.query(SQLConfig).first()
+    assert saved_config.username is None
+    assert saved_config.password is None
+    assert saved_config.use_windows_auth is True
+
+# DocumentRecord and DocumentLog Tests
+def test_document_record_with_user(db_session):
+    """Test creating a document record with user relationship."""
+    # Create a user first
+    user = User(username="testuser", full_name="Test User")
+    user.set_password("pass123")
+    db_session.add(user)
+    db_session.commit()
+    
+    # Create a document record
+    doc = DocumentRecord(
+        filename="test.pdf",
+        file_path="/uploads/test.pdf",
+        file_size=1024,
+        file_type="pdf",
+        uploaded_by=user.id
+    )
+    
+    db_session.add(doc)
+    db_session.commit()
+    
+    # Test the relationship
+    assert doc.user.username == "testuser"
+    assert doc.is_indexed is False
+    assert doc.is_deleted is False
+    assert isinstance(doc.upload_date, datetime)
+    assert isinstance(doc.last_modified, datetime)
+
+def test_document_log_relationships(db_session):
+    """Test document log relationships with user and document."""
+    # Create user and document
+    user = User(username="testuser", full_name="Test User")
+    user.set_password("pass123")
+    db_session.add(user)
+    db_session.commit()
+    
+    doc = DocumentRecord(
+        filename="test.pdf",
+        file_path="/uploads/test.pdf",
+        file_size=1024,
+        file_type="pdf",
+        uploaded_by=user.id
+    )
+    db_session.add(doc)
+    db_session.commit()
+    
+    # Create log entry
+    log = DocumentLog(
+        document_id=doc.id,
+        user_id=user.id,
+        action="upload",
+        details="Initial upload"
+    )
+    
+    db_session.add(log)
+    db_session.commit()
+    
+    # Test relationships
+    assert log.user.username == "testuser"
+    assert log.document.filename == "test.pdf"
+    assert isinstance(log.timestamp, datetime)
+    assert log.action == "upload"
+    assert log.details == "Initial upload"
+
+# Analytics Model Tests
+def test_query_feedback_and_topic(db_session):
+    """Test that feedback is stored as a small integer enum and topics are shared."""
+    user = User(username="testuser", full_name="Test User")
+    user.set_password("pass123")
+    topic = Topic(name="sql")
+    db_session.add_all([user, topic])
+    db_session.commit()
+
+    db_session.add_all([
+        Query(user_id=user.id, query="q1", topic_id=topic.id, feedback=Feedback.POSITIVE, response_time_ms=120),
+        Query(user_id=user.id, query="q2", topic_id=topic.id, feedback="negative")
+    ])
+    db_session.commit()
+
+    consultas = db_session.query(Query).order_by(Query.id).all()
+    assert consultas[0].feedback is Feedback.POSITIVE
+    assert consultas[1].feedback is Feedback.NEGATIVE
+    assert consultas[0].feedback.label == "positive"
+    assert consultas[0].topic.name == consultas[1].topic.name == "sql"
+    assert consultas[0].response_time_ms == 120
+    assert db_session.query(Query).filter(Query.feedback == "positive").count() == 1
+
+def test_query_responses_are_deduplicated(db_session):
+    """Test that identical responses share one compressed blob."""
+    user = User(username="testuser", full_name="Test User")
+    user.set_password("pass123")
+    db_session.add(user)
+    db_session.commit()
+
+    respuesta = "Hay 150 clientes activos. " * 20
+    db_session.add_all([
+        Query(user_id=user.id, query="q1", response_hash=ResponseBlob.guardar(db_session, respuesta)),
+        Query(user_id=user.id, query="q2", response_hash=ResponseBlob.guardar(db_session, respuesta),
+              sql_hash=ResponseBlob.guardar(db_session, "SELECT COUNT(*) FROM Clientes"))
+    ])
+    db_session.commit()
+
+    consultas = db_session.query(Query).order_by(Query.id).all()
+    assert db_session.query(ResponseBlob).count() == 2
+    assert consultas[0].response == consultas[1].response == respuesta
+    assert consultas[0].sql_generado is None
+    assert consultas[1].sql_generado == "SELECT COUNT(*) FROM Clientes"
+    assert len(consultas[0].response_blob.data) < len(respuesta.encode())
+
+def test_response_blob_concurrent_insert_is_ignored(db_session):
+    """Test that storing a text another request stored meanwhile does not fail."""
+    respuesta = "Hay 150 clientes activos."
+    sha256 = ResponseBlob.guardar(db_session, respuesta)
+    db_session.commit()
+
+    # Simulate the race: the existence check misses the row committed by the other request
+    with patch.object(db_session, "get", return_value=None):
+        assert ResponseBlob.guardar(db_session, respuesta) == sha256
+    db_session.commit()
+
+    assert db_session.query(ResponseBlob).count() == 1
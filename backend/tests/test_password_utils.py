@@ -1,103 +1,117 @@
-"""
-Unit tests for the password utilities module.
-"""
-
-import pytest
-from backend.auth.password_utils import get_password_hash, verify_password
-
-def test_password_hash_not_plain_text():
-    """Test that the hashed password is not the same as the plain text password."""
-    password = "mypassword123"
-    hashed = get_password_hash(password)
-    
-    assert hashed != password
-    assert len(hashed) > len(password)
-    assert hashed.startswith("$2b$")  # bcrypt identifier
-
-def test_password_hash_uniqueness():
-    """Test that the same password generates different hashes (due to salt)."""
-    password = "mypassword123"
-    hash1 = get_password_hash(password)
-    hash2 = get_password_hash(password)
-    
-    assert hash1 != hash2
-
-def test_verify_password_success():
-    """Test successful password verification."""
-    password = "mypassword123"
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-
-def test_verify_password_failure():
-    """Test failed password verification with wrong password."""
-    password = "mypassword123"
-    wrong_password = "wrongpassword123"
-    hashed = get_password_hash(password)
-    
-    assert verify_password(wrong_password, hashed) is False
-
-def test_verify_password_empty():
-    """Test password verification with empty strings."""
-    password = ""
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-    assert verify_password("somepassword", hashed) is False
-
-def test_verify_password_special_chars():
-    """Test password verification with special characters."""
-    password = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-
-def test_verify_password_unicode():
-    """Test password verification with unicode characters."""
-    password = "contraseña123アイウエオ"
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-
-def test_hash_length_consistency():
-    """Test that generated hashes have consistent length."""
-    passwords = [
-        "short",
-        "mediumpassword",
-        "averylongpasswordstring",
-        "!@#$%^&*()",
-        "contraseña123"
-    ]
-    
-    # Get the lengths of all hashes
-    hash_lengths = [len(get_password_hash(p)) for p in passwords]
-    
-    # All bcrypt hashes should have the same length
-    assert all(length == hash_lengths[0] for length in hash_lengths)
-
-def test_verify_password_case_sensitive():
-    """Test that password verification is case sensitive."""
-    password = "MyPassword123"
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-    assert verify_password(password.lower(), hashed) is False
-    assert verify_password(password.upper(), hashed) is False
-
-def test_verify_password_with_spaces():
-    """Test password verification with leading/trailing spaces."""
-    password = "  password with spaces  "
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-    assert verify_password(password.strip(), hashed) is False
-
-def test_long_password():
-    """Test handling of very long passwords."""
-    # Test with a reasonably long password instead of relying on bcrypt truncation
-    password = "a" * 100
-    hashed = get_password_hash(password)
-    
-    assert verify_password(password, hashed) is True
-    # Test that a different long password doesn't verify
-    assert verify_password("b" * 100, hashed) is False
\ No newline at end of file
+"""
+Unit tests for the password utilities module.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from backend.auth import password_utils
+from backend.auth.password_utils import get_password_hash, verify_password
+
+COMMON_PASSWORD = "mypassword123"
+
+# Length of a $2b$ hash: prefix, cost, 22-char salt and 31-char digest
+BCRYPT_HASH_LENGTH = 60
+
+@pytest.fixture(scope="session")
+def cached_hash():
+    """Return a function that hashes each fixed test password once per test session."""
+    hashes = {}
+    
+    def hash_once(password):
+        if password not in hashes:
+            hashes[password] = get_password_hash(password)
+        return hashes[password]
+    
+    return hash_once
+
+@pytest.fixture
+def password_and_hash(request, cached_hash):
+    """Pair the parametrized password with its hash, computed once per unique password."""
+    return request.param, cached_hash(request.param)
+
+def test_password_hash_not_plain_text():
+    """Test that the hashed password is not the same as the plain text password."""
+    hashed = get_password_hash(COMMON_PASSWORD)
+    
+    assert hashed != COMMON_PASSWORD
+    assert len(hashed) > len(COMMON_PASSWORD)
+    assert hashed[:4] == "$2b$"  # bcrypt identifier
+
+def test_password_hash_uniqueness():
+    """Test that the same password generates different hashes (due to salt)."""
+    password = COMMON_PASSWORD
+    hash1 = get_password_hash(password)
+    hash2 = get_password_hash(password)
+    
+    assert hash1 != hash2
+
+@pytest.mark.parametrize("password_and_hash, wrong_passwords", [
+    # Wrong password, case sensitivity and significant leading/trailing spaces
+    (COMMON_PASSWORD, [
+        "wrongpassword123",
+        COMMON_PASSWORD.upper(),
+        COMMON_PASSWORD.capitalize(),
+        f"  {COMMON_PASSWORD}  ",
+        f"{COMMON_PASSWORD} "
+    ]),
+    ("", ["somepassword"]),
+    ("!@#$%^&*()_+-=[]{}|;:,.<>?", []),
+    ("contraseña123アイウエオ", []),
+    # The longest password bcrypt uses in full (72 bytes): its last byte still counts
+    ("a" * 72, ["a" * 71 + "b", "a" * 71])
+], ids=["common", "empty", "special_chars", "unicode", "long"], indirect=["password_and_hash"])
+def test_verify_password_matrix(password_and_hash, wrong_passwords):
+    """Test that a hash verifies its own password and rejects every wrong variant."""
+    password, hashed = password_and_hash
+    
+    assert verify_password(password, hashed) is True
+    for wrong in wrong_passwords:
+        assert verify_password(wrong, hashed) is False, wrong
+
+def test_verify_password_bytes():
+    """Test that a pre-encoded password hashes and verifies like its str form."""
+    password = "contraseña123アイウエオ"
+    pwd_bytes = password.encode("utf-8")
+    hashed = get_password_hash(pwd_bytes)
+    
+    assert verify_password(pwd_bytes, hashed) is True
+    assert verify_password(password, hashed) is True
+
+def test_hash_length_consistency():
+    """Test that generated hashes have consistent length."""
+    passwords = [
+        "short",
+        "mediumpassword",
+        "averylongpasswordstring",
+        "!@#$%^&*()",
+        "contraseña123"
+    ]
+    # bcrypt releases the GIL while hashing, so the hashes run in parallel
+    with ThreadPoolExecutor(max_workers=len(passwords)) as executor:
+        hashes = list(executor.map(get_password_hash, passwords))
+    
+    # All bcrypt hashes are exactly BCRYPT_HASH_LENGTH characters
+    for password, hashed in zip(passwords, hashes):
+        assert len(hashed) == BCRYPT_HASH_LENGTH, password
+
+def test_hash_uses_module_work_factor():
+    """
+    Test that hashing reads the module-level work factor at call time.
+    
+    The bcrypt configuration lives in module constants, not in a context
+    object built per call; the conftest patch of BCRYPT_ROUNDS must show
+    up in the cost field of every new hash.
+    """
+    hashed = get_password_hash(COMMON_PASSWORD)
+    
+    assert hashed[4:6] == f"{password_utils.BCRYPT_ROUNDS:02d}"
+
+@pytest.mark.slow
+def test_production_hash_format(production_bcrypt):
+    """Test the production bcrypt cost and hash format."""
+    hashed = get_password_hash(COMMON_PASSWORD)
+    
+    assert hashed.startswith("$2b$12$")
+    assert len(hashed) == BCRYPT_HASH_LENGTH
+    assert verify_password(COMMON_PASSWORD, hashed) is True
@@ -0,0 +1,73 @@
+"""
+Unit tests for the question cache module.
+"""
+
+import pytest
+from backend.sql.question_cache import QuestionCache, clave_pregunta, literales_pregunta
+
+RESPUESTA = {"respuesta": "Hay 150 clientes", "sql_generado": "SELECT COUNT(*) FROM Clientes"}
+
+def test_exact_hit_ignores_case_and_whitespace():
+    """Test that questions differing only in case/outer spaces share an entry."""
+    cache = QuestionCache()
+    cache.put("¿Cuántos clientes hay?", RESPUESTA)
+
+    assert cache.get("  ¿cuántos CLIENTES hay? ") == RESPUESTA
+    assert clave_pregunta("Hola") == clave_pregunta(" hola ")
+
+def test_exact_miss():
+    """Test that an unknown question is a miss."""
+    cache = QuestionCache()
+    cache.put("¿Cuántos clientes hay?", RESPUESTA)
+
+    assert cache.get("¿Cuántas ventas hubo?") is None
+
+def test_semantic_hit_above_threshold():
+    """Test that a near-identical embedding returns the cached answer."""
+    cache = QuestionCache(threshold=0.95)
+    cache.put("¿Cuántos clientes hay?", RESPUESTA, [1.0, 0.0, 0.0])
+
+    assert cache.get_similar([0.99, 0.05, 0.0], "¿Número de clientes?") == RESPUESTA
+    assert cache.get_similar([0.0, 1.0, 0.0], "¿Número de clientes?") is None
+
+def test_semantic_hit_requires_same_literals():
+    """Test that similar questions with different numbers or quoted values don't share answers."""
+    cache = QuestionCache(threshold=0.95)
+    cache.put("Ventas de 2023", RESPUESTA, [1.0, 0.0, 0.0])
+
+    assert cache.get_similar([1.0, 0.0, 0.0], "Ventas de 2024") is None
+    assert cache.get_similar([1.0, 0.0, 0.0], "¿Ventas del 2023?") == RESPUESTA
+    assert literales_pregunta("Pedidos de 'ACME' entre 2023-01-01 y 31/12/2023") == (
+        "'acme'", "2023-01-01", "31/12/2023"
+    )
+
+def test_entries_expire():
+    """Test that entries are not returned after their TTL."""
+    cache = QuestionCache(ttl=-1)
+    cache.put("¿Cuántos clientes hay?", RESPUESTA, [1.0, 0.0])
+
+    assert cache.get("¿Cuántos clientes hay?") is None
+    assert cache.get_similar([1.0, 0.0], "¿Cuántos clientes hay?") is None
+    assert len(cache) == 0
+
+def test_lru_eviction_removes_vector():
+    """Test that the least recently used entry is evicted with its embedding."""
+    cache = QuestionCache(maxsize=2)
+    cache.put("a", {"respuesta": "a"}, [1.0, 0.0])
+    cache.put("b", {"respuesta": "b"}, [0.0, 1.0])
+    cache.get("a")
+    cache.put("c", {"respuesta": "c"}, [0.7, 0.7])
+
+    assert cache.get("b") is None
+    assert cache.get_similar([0.0, 1.0], "b") is None
+    assert cache.get("a") == {"respuesta": "a"}
+    assert len(cache) == 2
+
+def test_remove_entry():
+    """Test that a removed question is no longer returned."""
+    cache = QuestionCache()
+    cache.put("¿Cuántos clientes hay?", RESPUESTA, [1.0, 0.0])
+    cache.remove("¿cuántos clientes hay?")
+
+    assert cache.get("¿Cuántos clientes hay?") is None
+    assert cache.get_similar([1.0, 0.0], "¿Cuántos clientes hay?") is None
@@ -0,0 +1,64 @@
+"""
+Unit tests for SQL result formatting utilities.
+"""
+
+from backend.sql.rag_sql_utils import formatear_columnas, unir_acotado, convertir_resultado_a_texto
+
+def test_formatear_columnas_lines():
+    """Test that column-oriented values are formatted one line per row."""
+    lineas = formatear_columnas(["nombre", "edad"], [["Juan", "Ana"], [30, 31]])
+
+    assert lineas == ["- nombre: Juan, edad: 30", "- nombre: Ana, edad: 31"]
+
+def test_formatear_columnas_percent_in_names():
+    """Test that '%' in column names is kept literally instead of read as a format."""
+    lineas = formatear_columnas(["100%", "a%sb", "%(x)d"], [[1], ["%s"], [(2, 3)]])
+
+    assert lineas == ["- 100%: 1, a%sb: %s, %(x)d: (2, 3)"]
+
+def test_formatear_columnas_no_columns():
+    """Test that a result without columns produces no lines."""
+    assert formatear_columnas([], []) == []
+
+def test_unir_acotado_respects_budget():
+    """Test that lines are added only while the text stays within max_chars."""
+    lineas = [f"- fila {i}" for i in range(10)]
+
+    texto, incluidas = unir_acotado("Cabecera:", lineas, max_chars=40)
+
+    assert len(texto) <= 40
+    assert incluidas == lineas[:len(incluidas)]
+    assert texto == "\n".join(["Cabecera:", *incluidas])
+    # The next line would not have fitted
+    assert len(texto) + 1 + len(lineas[len(incluidas)]) > 40
+
+def test_unir_acotado_consumes_lazily():
+    """Test that lines after the budget is reached are never generated."""
+    generadas = []
+
+    def lineas():
+        for i in range(1000):
+            generadas.append(i)
+            yield "x" * 10
+
+    unir_acotado("", lineas(), max_chars=50)
+
+    assert len(generadas) < 10
+
+def test_unir_acotado_cuts_single_oversized_line():
+    """Test that a first line larger than the budget is cut instead of dropped."""
+    texto, incluidas = unir_acotado("cab", ["x" * 100], max_chars=20)
+
+    assert incluidas == ["x" * 16]
+    assert texto == "cab\n" + "x" * 16
+    assert len(texto) == 20
+
+def test_convertir_resultado_counts_omitted_rows():
+    """Test that rows beyond the context budget are summarized with a count."""
+    n = 5000
+    resultado = {"columnas": ["id"], "valores": [list(range(n))], "num_filas": n}
+
+    texto = convertir_resultado_a_texto(resultado)
+
+    assert texto.startswith("Resumen de resultados obtenidos de la base de datos:\n- id: 0\n")
+    assert texto.endswith("filas más no incluidas)")
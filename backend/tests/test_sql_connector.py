@@ -0,0 +1,99 @@
+"""
+Unit tests for the SQL Server connector utilities.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+# The connector imports pyodbc, which needs the system ODBC driver manager
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+from backend.sql.sql_connector import construir_sql_url, ejecutar_queries
+
+DRIVER = "ODBC Driver 17 for SQL Server"
+
+def _config(**cambios):
+    config = {
+        "server": "sqlhost",
+        "database": "ventas",
+        "driver": DRIVER,
+        "use_windows_auth": False,
+        "username": "app",
+        "password": "secreto",
+    }
+    config.update(cambios)
+    return config
+
+def test_construir_sql_url_sql_auth():
+    """Test that SQL authentication puts the credentials, host and driver in the URL."""
+    url = make_url(construir_sql_url(_config()))
+
+    assert url.drivername == "mssql+pyodbc"
+    assert (url.username, url.password) == ("app", "secreto")
+    assert (url.host, url.database) == ("sqlhost", "ventas")
+    assert url.query == {"driver": DRIVER}
+
+def test_construir_sql_url_quotes_special_characters():
+    """Test that credentials with URL delimiters survive the round trip."""
+    usuario = "dominio\\app@ventas"
+    password = "p@ss:w/rd?#%&+ 1"
+
+    url = make_url(construir_sql_url(_config(username=usuario, password=password, driver="Driver+Plus & Co")))
+
+    assert url.username == usuario
+    assert url.password == password
+    assert url.host == "sqlhost"
+    assert url.query["driver"] == "Driver+Plus & Co"
+
+def test_construir_sql_url_named_instance():
+    """Test that HOST\\INSTANCE connects to the host and passes the full name as server."""
+    url = make_url(construir_sql_url(_config(server="sqlhost\\SQLEXPRESS")))
+
+    assert url.host == "sqlhost"
+    assert url.query["server"] == "sqlhost\\SQLEXPRESS"
+
+def test_construir_sql_url_windows_auth():
+    """Test that Windows authentication drops the credentials and sets a trusted connection."""
+    url = make_url(construir_sql_url(_config(use_windows_auth=True)))
+
+    assert url.username is None
+    assert url.password is None
+    assert url.query == {"driver": DRIVER, "trusted_connection": "yes"}
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite database with a reserved-word table and a regular one."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as conn:
+        conn.exec_driver_sql('CREATE TABLE "order" (id INTEGER PRIMARY KEY)')
+        conn.exec_driver_sql('INSERT INTO "order" (id) VALUES (1), (2)')
+        conn.exec_driver_sql("CREATE TABLE clientes (id INTEGER PRIMARY KEY, pais TEXT)")
+        conn.exec_driver_sql("INSERT INTO clientes (id, pais) VALUES (1, 'España'), (2, 'Francia')")
+    yield engine
+    engine.dispose()
+
+def test_ejecutar_queries_returns_columnar_results(engine):
+    """Test that every query gets its own result, in order."""
+    resultados = ejecutar_queries([
+        ('SELECT COUNT(*) AS n FROM "order"', None),
+        ("SELECT id FROM clientes WHERE pais = :pais", {"pais": "Francia"}),
+    ], engine=engine)
+
+    assert resultados[0] == {"columnas": ["n"], "valores": [[2]], "num_filas": 1}
+    assert resultados[1] == {"columnas": ["id"], "valores": [[2]], "num_filas": 1}
+
+def test_ejecutar_queries_isolates_failing_query(engine):
+    """Test that a failing query doesn't fail the other queries."""
+    resultados = ejecutar_queries([
+        ("SELECT COUNT(*) FROM order", None),
+        ("SELECT COUNT(*) FROM clientes", None),
+    ], engine=engine)
+
+    assert "error" in resultados[0]
+    assert resultados[1]["valores"] == [[2]]
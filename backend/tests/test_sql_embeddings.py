@@ -0,0 +1,122 @@
+"""
+Unit tests for SQL record embedding helpers.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+# sql_embeddings imports the SQL connector, which needs pyodbc and the
+# system ODBC driver manager
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+from backend.sql import sql_embeddings
+from backend.sql.sql_embeddings import _lotes_de_embedding, _paginas_de_tabla
+
+class ContadorDePalabras:
+    """Stand-in encoding: one token per word, recording the texts it tokenizes."""
+
+    def __init__(self):
+        self.tokenizados = []
+
+    def encode_ordinary_batch(self, textos):
+        self.tokenizados.extend(textos)
+        return [texto.split() for texto in textos]
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite database with tables keyed in different ways."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE clientes (id INTEGER PRIMARY KEY, nombre TEXT)")
+        conn.exec_driver_sql("INSERT INTO clientes (id, nombre) VALUES (3, 'c'), (1, 'a'), (5, 'e'), (2, 'b'), (4, 'd')")
+        conn.exec_driver_sql("CREATE TABLE lineas (pedido INTEGER, linea INTEGER, PRIMARY KEY (pedido, linea))")
+        conn.exec_driver_sql("INSERT INTO lineas VALUES (1, 1), (1, 2), (2, 1)")
+        conn.exec_driver_sql('CREATE TABLE "order" ("select" INTEGER PRIMARY KEY, "from" TEXT)')
+        conn.exec_driver_sql('INSERT INTO "order" VALUES (1, \'x\'), (2, \'y\'), (3, \'z\')')
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def sentencias(engine):
+    """Statements that read table rows (schema inspection is left out)."""
+    enviadas = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT *"):
+            enviadas.append(statement)
+
+    return enviadas
+
+def _leer(engine, table, batch_size):
+    return [
+        (columnas, [tuple(fila) for fila in pagina])
+        for columnas, pagina in _paginas_de_tabla(engine, table, batch_size)
+    ]
+
+def test_paginas_single_key_keyset(engine, sentencias):
+    """Test that a single-column key is paged in key order with keyset queries."""
+    paginas = _leer(engine, "clientes", 2)
+
+    assert [columnas for columnas, _ in paginas] == [["id", "nombre"]] * 3
+    assert [fila[0] for _, pagina in paginas for fila in pagina] == [1, 2, 3, 4, 5]
+    assert [len(pagina) for _, pagina in paginas] == [2, 2, 1]
+    # One query per page plus the empty page that ends the loop
+    assert len(sentencias) == 4
+    assert all("ORDER BY" in sql and "LIMIT" in sql for sql in sentencias)
+
+def test_paginas_composite_key_streams(engine, sentencias):
+    """Test that a composite key falls back to one streamed SELECT."""
+    paginas = _leer(engine, "lineas", 2)
+
+    assert [len(pagina) for _, pagina in paginas] == [2, 1]
+    assert sorted(fila for _, pagina in paginas for fila in pagina) == [(1, 1), (1, 2), (2, 1)]
+    assert len(sentencias) == 1
+    assert "ORDER BY" not in sentencias[0]
+
+def test_paginas_reserved_word_names(engine):
+    """Test that table and key names that are SQL keywords are quoted."""
+    paginas = _leer(engine, "order", 2)
+
+    assert paginas[0][0] == ["select", "from"]
+    assert [fila for _, pagina in paginas for fila in pagina] == [(1, "x"), (2, "y"), (3, "z")]
+
+@pytest.fixture
+def encoding(monkeypatch):
+    """Replace the tiktoken encoding with a word counter."""
+    contador = ContadorDePalabras()
+    monkeypatch.setattr(sql_embeddings, "get_encoding", lambda: contador)
+    return contador
+
+def test_lotes_short_texts_skip_tokenizer(encoding, monkeypatch):
+    """Test that texts far below the token limit are batched by count without tokenizing."""
+    monkeypatch.setattr(sql_embeddings, "EMBEDDING_BATCH_SIZE", 10)
+    textos = [f"registro {i}" for i in range(25)]
+
+    assert _lotes_de_embedding(textos) == [(0, 10), (10, 20), (20, 25)]
+    assert encoding.tokenizados == []
+
+def test_lotes_respect_token_limit(encoding, monkeypatch):
+    """Test that requests are cut on exact token counts once the bound gets near the limit."""
+    monkeypatch.setattr(sql_embeddings, "EMBEDDING_BATCH_MAX_TOKENS", 100)
+    # 40 one-letter words: 80 characters, bounded at 320 tokens, exactly 40 tokens
+    textos = ["a " * 40] * 5
+
+    assert _lotes_de_embedding(textos) == [(0, 2), (2, 4), (4, 5)]
+    assert encoding.tokenizados
+
+def test_lotes_oversized_text_gets_own_request(encoding, monkeypatch):
+    """Test that a text over the token limit is sent alone rather than dropped."""
+    monkeypatch.setattr(sql_embeddings, "EMBEDDING_BATCH_MAX_TOKENS", 100)
+    textos = ["corto", "a " * 200, "corto"]
+
+    assert _lotes_de_embedding(textos) == [(0, 1), (1, 2), (2, 3)]
+
+def test_lotes_empty():
+    """Test that no texts produce no requests."""
+    assert _lotes_de_embedding([]) == []
@@ -0,0 +1,75 @@
+"""
+Unit tests for the atomic vector store save and crash recovery.
+"""
+
+import os
+import pytest
+
+from backend.core.vectorstore_io import guardar_atomico, recuperar
+
+ARCHIVOS = ("index.faiss", "index.pkl")
+
+def _escribir(contenido):
+    def escribir(directorio):
+        os.makedirs(directorio)
+        for nombre in ARCHIVOS:
+            with open(os.path.join(directorio, nombre), "w") as f:
+                f.write(contenido)
+    return escribir
+
+def _leer(directorio):
+    with open(os.path.join(directorio, "index.faiss")) as f:
+        return f.read()
+
+@pytest.fixture
+def ruta(tmp_path):
+    """Path of a vector store directory inside a temporary directory."""
+    return str(tmp_path / "vectorstore")
+
+def test_guardar_atomico_replaces_directory(ruta):
+    """Test that a save replaces the previous contents and leaves no leftovers."""
+    guardar_atomico(ruta, _escribir("v1"))
+    guardar_atomico(ruta, _escribir("v2"))
+
+    assert _leer(ruta) == "v2"
+    assert not os.path.exists(ruta + ".tmp")
+    assert not os.path.exists(ruta + ".old")
+
+def test_guardar_atomico_keeps_previous_on_error(ruta):
+    """Test that a failing write leaves the saved directory untouched."""
+    guardar_atomico(ruta, _escribir("v1"))
+
+    def fallar(directorio):
+        os.makedirs(directorio)
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        guardar_atomico(ruta, fallar)
+    assert _leer(ruta) == "v1"
+
+def test_recuperar_prefers_new_contents(ruta):
+    """Test that a crash between the renames restores the complete new version."""
+    _escribir("old")(ruta + ".old")
+    _escribir("new")(ruta + ".tmp")
+
+    recuperar(ruta, ARCHIVOS)
+
+    assert _leer(ruta) == "new"
+
+def test_recuperar_skips_incomplete_candidate(ruta):
+    """Test that a partially written ".tmp" is ignored in favour of ".old"."""
+    _escribir("old")(ruta + ".old")
+    os.makedirs(ruta + ".tmp")
+
+    recuperar(ruta, ARCHIVOS)
+
+    assert _leer(ruta) == "old"
+
+def test_recuperar_leaves_existing_directory(ruta):
+    """Test that recovery does nothing when the directory exists."""
+    guardar_atomico(ruta, _escribir("v1"))
+    _escribir("stale")(ruta + ".old")
+
+    recuperar(ruta, ARCHIVOS)
+
+    assert _leer(ruta) == "v1"